@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from digits import precisiones_por_opcode
+
+
+def ruta_cache(api):
+    """Archivo de caché propio de la cuenta de la sesión; sin email (p. ej. el simulador) no se persiste."""
+    email = getattr(api, 'email', None)
+    if not email:
+        return None
+    return f"activos_cache_{hashlib.sha1(email.strip().lower().encode()).hexdigest()[:12]}.json"
+
+
+class AssetCatalog:
+    """Catálogo de activos compartido, persistido en disco y con TTL.
+
+    Guarda por activo el opcode, el payout y la precisión decimal. Las búsquedas son
+    accesos a diccionario; la API solo se consulta cuando el catálogo caduca, cuando
+    la API local no conoce los activos cacheados o cuando se pide un activo
+    desconocido y la última actualización tiene más de min_refresh segundos.
+    Por defecto la caché se guarda en un archivo por cuenta (ruta_cache).
+    """
+
+    _compartidos = {}
+    _compartidos_lock = threading.Lock()
+
+    @classmethod
+    def compartido(cls, api, **kwargs):
+        with cls._compartidos_lock:
+            catalogo = cls._compartidos.get(id(api))
+            if catalogo is None or catalogo.api is not api:
+                catalogo = cls._compartidos[id(api)] = cls(api, **kwargs)
+            return catalogo
+
+    def __init__(self, api, path='auto', ttl=3600, min_refresh=60):
+        self.api = api
+        self.path = ruta_cache(api) if path == 'auto' else path
+        self.ttl = ttl
+        self.min_refresh = min_refresh
+        self.activos = {}
+        self.actualizado = 0
+        self._ultimo_intento = 0
+        self._suscritos = set()
+        self._lock = threading.RLock()
+        self._cargar()
+
+    def _cargar(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as archivo:
+                data = json.load(archivo)
+            self.activos = data['activos']
+            self.actualizado = data['actualizado']
+        except Exception as e:
+            logging.warning(f"Caché de activos no válida, se ignora: {e}")
+
+    def _guardar(self):
+        if not self.path:
+            return
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as archivo:
+            json.dump({'actualizado': self.actualizado, 'activos': self.activos}, archivo)
+        os.replace(tmp_path, self.path)
+
+    def vigente(self):
+        return bool(self.activos) and time.time() - self.actualizado < self.ttl
+
+    def _api_al_dia(self):
+        conocidos = {k.upper() for k in self.api.get_all_ACTIVES_OPCODE()}
+        return all(asset in conocidos for asset in self.activos)
+
+    def refresh(self, force=False):
+        """Actualiza el catálogo si hace falta; devuelve True si se consultó la API."""
+        with self._lock:
+            if not force and self.vigente() and self._api_al_dia():
+                return False
+            self._ultimo_intento = time.time()
+            logging.info("Sincronizando activos con IQ Option...")
+            self.api.update_ACTIVES_OPCODE()
+            opcodes = {k.upper(): v for k, v in self.api.get_all_ACTIVES_OPCODE().items()}
+            previos = {k: v['opcode'] for k, v in self.activos.items()}
+            if force or not self.vigente() or opcodes != previos:
+                self.activos = self._metadatos(opcodes)
+                self.actualizado = time.time()
+                self._guardar()
+            logging.info(f"Activos sincronizados correctamente ({len(self.activos)}).")
+            return True
+
+    def _metadatos(self, opcodes):
+        try:
+            precisiones = precisiones_por_opcode(self.api.get_all_init_v2())
+        except Exception as e:
+            logging.warning(f"No se pudieron leer las precisiones de los activos: {e}")
+            precisiones = {}
+        try:
+            profits = {k.upper(): v for k, v in self.api.get_all_profit().items()}
+        except Exception as e:
+            logging.warning(f"No se pudieron leer los payouts de los activos: {e}")
+            profits = {}
+        activos = {}
+        for asset, opcode in opcodes.items():
+            profit = profits.get(asset) or {}
+            activos[asset] = {
+                'opcode': opcode,
+                'payout': profit.get('turbo') or profit.get('binary'),
+                'precision': precisiones.get(str(opcode)),
+            }
+        return activos
+
+    def suscribir_top_assets(self, instrument_type="binary-option"):
+        with self._lock:
+            if instrument_type not in self._suscritos:
+                self.api.subscribe_top_assets_updated(instrument_type)
+                self._suscritos.add(instrument_type)
+
+    def __contains__(self, asset):
+        asset = asset.upper()
+        if asset in self.activos:
+            return True
+        if time.time() - self._ultimo_intento > self.min_refresh:
+            self.refresh(force=True)
+        return asset in self.activos
+
+    def get(self, asset):
+        return self.activos.get(asset.upper())
+
+    def precision(self, asset):
+        info = self.get(asset)
+        return info['precision'] if info else None
+
+    def payout(self, asset):
+        info = self.get(asset)
+        return info['payout'] if info else None
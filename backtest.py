@@ -0,0 +1,117 @@
+import argparse
+import logging
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from digits import ultimos_digitos, inferir_precision
+from tick_buffer import BLUE, RED
+from tick_recorder import leer_archivo
+
+NONE = 0
+CALL = 1
+PUT = -1
+
+
+def colores(prices):
+    """Color de cada tick respecto al anterior (el primero es azul), como en process_tick."""
+    prices = np.asarray(prices, dtype=np.float64)
+    colors = np.full(len(prices), BLUE, dtype=np.int8)
+    colors[1:][prices[1:] < prices[:-1]] = RED
+    return colors
+
+
+def decisiones(digits, colors):
+    """Evalúa la regla de presión/interrupción de analyze_pressure sobre N ventanas a la vez.
+
+    digits y colors son arrays (N, k); devuelve un array (N,) con CALL, PUT o NONE.
+    """
+    digits = np.asarray(digits)
+    colors = np.asarray(colors)
+    n, k = digits.shape
+    rows = np.arange(n)
+    max_index = digits.argmax(axis=1)
+    max_color = colors[rows, max_index]
+    max_parity = digits[rows, max_index] % 2
+    after = np.arange(k)[None, :] > max_index[:, None]
+    interrupted = (after & (colors != max_color[:, None]) & (digits % 2 != max_parity[:, None])).any(axis=1)
+    return np.where(interrupted, NONE, np.where(max_color == BLUE, CALL, PUT)).astype(np.int8)
+
+
+def liquidar(acciones, entrada, salida, payout=0.85, stake=1.0):
+    """P&L simulado de cada ventana: payout si acierta, -stake si falla y 0 en empate o sin operación."""
+    movimiento = np.sign(salida - entrada) * acciones
+    profit = np.where(movimiento > 0, stake * payout, np.where(movimiento < 0, -stake, 0.0))
+    return np.where(acciones == NONE, 0.0, profit)
+
+
+def backtest_ticks(prices, precision=None, timestamps=None, analyze_ticks=4, horizon=60, payout=0.85, stake=1.0):
+    """Recorre una serie de ticks con todas las ventanas deslizantes de analyze_ticks ticks.
+
+    La entrada es el último precio de cada ventana y la salida el primer tick pasados
+    `horizon` segundos (si hay timestamps) o `horizon` ticks después.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if precision is None:
+        precision = inferir_precision(prices[:1000])
+    digits = ultimos_digitos(prices, precision)
+    colors = colores(prices)
+    acciones = decisiones(sliding_window_view(digits, analyze_ticks), sliding_window_view(colors, analyze_ticks))
+
+    fin = np.arange(analyze_ticks - 1, len(prices))
+    if timestamps is not None:
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        salida_idx = np.searchsorted(timestamps, timestamps[fin] + horizon)
+    else:
+        salida_idx = fin + horizon
+    valido = salida_idx < len(prices)
+    acciones = np.where(valido, acciones, NONE).astype(np.int8)
+    salida_idx = np.minimum(salida_idx, len(prices) - 1)
+    profit = liquidar(acciones, prices[fin], prices[salida_idx], payout, stake)
+    return {'fin': fin, 'acciones': acciones, 'profit': profit}
+
+
+def resumen(resultado):
+    acciones = resultado['acciones']
+    profit = resultado['profit']
+    operadas = acciones != NONE
+    wins = int((profit > 0).sum())
+    losses = int((profit < 0).sum())
+    return {
+        'ventanas': len(acciones),
+        'operaciones': int(operadas.sum()),
+        'calls': int((acciones == CALL).sum()),
+        'puts': int((acciones == PUT).sum()),
+        'wins': wins,
+        'losses': losses,
+        'empates': int(operadas.sum()) - wins - losses,
+        'win_rate': wins / max(wins + losses, 1),
+        'lucro': float(profit.sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest vectorizado de la estrategia de presión de dígitos.")
+    parser.add_argument('archivo', help="Archivo .bin de TickRecorder, .npy o de texto con un precio por línea")
+    parser.add_argument('--precision', type=int, default=None)
+    parser.add_argument('--ticks', type=int, default=4)
+    parser.add_argument('--horizonte', type=int, default=60, help="Segundos (archivos .bin) o ticks hasta la expiración")
+    parser.add_argument('--payout', type=float, default=0.85)
+    args = parser.parse_args()
+
+    timestamps = None
+    if args.archivo.endswith('.bin'):
+        ticks = leer_archivo(args.archivo)
+        prices, timestamps = ticks['price'], ticks['timestamp']
+    elif args.archivo.endswith('.npy'):
+        prices = np.load(args.archivo)
+    else:
+        prices = np.loadtxt(args.archivo)
+    resultado = backtest_ticks(prices, args.precision, timestamps, args.ticks, args.horizonte, args.payout)
+    for clave, valor in resumen(resultado).items():
+        logging.info(f"{clave}: {valor}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    main()
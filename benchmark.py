@@ -0,0 +1,189 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+
+def medir(func, repeticiones, preparar=None):
+    """Ejecuta func `repeticiones` veces y devuelve percentiles de latencia (µs) y memoria pico (KiB)."""
+    tiempos = np.empty(repeticiones)
+    for i in range(repeticiones):
+        args = preparar(i) if preparar else ()
+        inicio = time.perf_counter()
+        func(*args)
+        tiempos[i] = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    for i in range(min(repeticiones, 100)):
+        func(*(preparar(i) if preparar else ()))
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    us = tiempos * 1e6
+    return {
+        'n': repeticiones,
+        'p50_us': float(np.percentile(us, 50)),
+        'p90_us': float(np.percentile(us, 90)),
+        'p99_us': float(np.percentile(us, 99)),
+        'max_us': float(us.max()),
+        'mem_kib': pico / 1024,
+    }
+
+
+def generar_historico(path, lineas, seed=0):
+    from journal import crear_fila, formatear_linea
+
+    rng = random.Random(seed)
+    decisiones = {'call': 'CALL (UP)', 'put': 'PUT (DOWN)'}
+    with open(path, 'w') as archivo:
+        for _ in range(lineas):
+            digits_info = [{'digit': rng.randint(0, 9), 'color': rng.choice(('blue', 'red'))} for _ in range(4)]
+            action = rng.choice(('call', 'put', None))
+            if action:
+                resultado = rng.choice(('WIN', 'LOSS', 'EMPATE', 'NONE'))
+                lucro = {'WIN': 0.85, 'LOSS': -1.0}.get(resultado, 0)
+                fila = crear_fila('SIM0-OTC', action, resultado, lucro, digits_info, decisiones[action])
+            else:
+                fila = crear_fila('SIM0-OTC', 'None', 'NONE', 0, digits_info, 'No se realiza operación')
+            archivo.write(formatear_linea(fila))
+
+
+def bench_bot(repeticiones):
+    import bot
+    from simulator import SimulatedIQOption
+
+    api = SimulatedIQOption(n_assets=1, precision=5)
+    b = bot.NumberPressureBot(None, None, 1, api.assets[0], api=api, precision=5)
+    b.mostrar_ticks = False
+    rng = np.random.default_rng(0)
+    precios = np.round(18 + np.cumsum(rng.normal(0, 1e-4, repeticiones + b.max_ticks)), 5).tolist()
+    resultados = {}
+
+    resultados['get_last_digit'] = medir(b.get_last_digit, repeticiones, lambda i: (precios[i],))
+    resultados['process_tick'] = medir(b.process_tick, repeticiones, lambda i: ({'price': precios[i], 'timestamp': i},))
+
+    sink = io.StringIO()
+    def analizar():
+        sink.seek(0)
+        sink.truncate()
+        with contextlib.redirect_stdout(sink):
+            return b.analyze_pressure()
+    resultados['analyze_pressure'] = medir(analizar, repeticiones, lambda i: b.process_tick({'price': precios[i]}) or ())
+
+    digits_info = [{'digit': 7, 'color': 'blue'}, {'digit': 2, 'color': 'red'},
+                   {'digit': 9, 'color': 'blue'}, {'digit': 4, 'color': 'blue'}]
+    if bot.modelos.cargar() is not None:
+        b.usar_tabla = True
+        resultados['predict_result[tabla]'] = medir(b.predict_result, repeticiones, lambda i: (digits_info, 'CALL (UP)'))
+        b.usar_tabla = False
+        resultados['predict_result[modelo]'] = medir(b.predict_result, min(repeticiones, 200), lambda i: (digits_info, 'CALL (UP)'))
+
+    resultados['registrar_operacion'] = medir(
+        bot.registrar_operacion, repeticiones,
+        lambda i: ('SIM0-OTC', 'call', 'WIN', 0.85, digits_info, 'CALL (UP)', 'WIN', 0.7))
+    bot.obtener_journal().flush()
+    return resultados
+
+
+def bench_ia(tamanos, max_train):
+    import ia
+
+    resultados = {}
+    for lineas in tamanos:
+        path = f'historico_{lineas}.txt'
+        generar_historico(path, lineas)
+        inicio = time.perf_counter()
+        df = ia.parse_historico(path, cache_path=f'{path}.pkl')
+        resultados[f'parse_historico[{lineas}]'] = {'n': 1, 'total_s': time.perf_counter() - inicio, 'filas': len(df)}
+        with open(path, 'a') as archivo, open(path) as origen:
+            archivo.writelines(line for _, line in zip(range(max(lineas // 100, 1)), origen))
+        inicio = time.perf_counter()
+        ia.parse_historico(path, cache_path=f'{path}.pkl')
+        resultados[f'parse_historico_incremental[{lineas}]'] = {'n': 1, 'total_s': time.perf_counter() - inicio}
+        if lineas <= max_train:
+            df, le_result = ia.preprocess_data(df)
+            for modo in ('completo', 'halving'):
+                inicio = time.perf_counter()
+                ia.train_model(df.copy(), le_result, modo)
+                nombre = 'train_model' if modo == 'completo' else f'train_model_{modo}'
+                resultados[f'{nombre}[{lineas}]'] = {'n': 1, 'total_s': time.perf_counter() - inicio}
+        os.remove(path)
+    return resultados
+
+
+def comparar(resultados, baseline, tolerancia):
+    regresiones = []
+    for nombre, actual in resultados.items():
+        previo = baseline.get(nombre)
+        if not previo:
+            continue
+        for clave in ('p50_us', 'p99_us', 'total_s'):
+            if clave in actual and clave in previo and actual[clave] > previo[clave] * tolerancia:
+                regresiones.append(f"{nombre} {clave}: {previo[clave]:.2f} -> {actual[clave]:.2f}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del camino de decisión y del entrenamiento.")
+    parser.add_argument('--repeticiones', type=int, default=10000)
+    parser.add_argument('--lineas', type=int, nargs='*', default=[10000, 100000],
+                        help="Tamaños de histórico generado (hasta 10M)")
+    parser.add_argument('--max-train', type=int, default=10000, help="Tamaño máximo con el que se mide train_model")
+    parser.add_argument('--ticks-ciclo', type=int, default=100, help="Ticks recibidos por ciclo para estimar el presupuesto")
+    parser.add_argument('--guardar', action='store_true', help="Guarda los resultados como nueva línea base")
+    parser.add_argument('--tolerancia', type=float, default=1.5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            # bench_ia deja entrenado el modelo en el directorio temporal y bench_bot lo carga desde ahí
+            resultados = bench_ia(args.lineas, args.max_train)
+            resultados.update(bench_bot(args.repeticiones))
+        finally:
+            os.chdir(cwd)
+
+    for nombre, r in resultados.items():
+        if 'p50_us' in r:
+            logging.info(f"{nombre:32s} p50={r['p50_us']:9.1f}µs p90={r['p90_us']:9.1f}µs "
+                         f"p99={r['p99_us']:9.1f}µs max={r['max_us']:9.1f}µs mem={r['mem_kib']:8.1f}KiB")
+        else:
+            logging.info(f"{nombre:32s} total={r['total_s']:.3f}s")
+
+    prediccion = resultados.get('predict_result[tabla]', {'p99_us': 0})['p99_us']
+    ciclo_us = (args.ticks_ciclo * resultados['process_tick']['p99_us'] + resultados['analyze_pressure']['p99_us']
+                + prediccion + resultados['registrar_operacion']['p99_us'])
+    logging.info(f"Cómputo por ciclo (p99, {args.ticks_ciclo} ticks): {ciclo_us / 1000:.2f} ms "
+                 f"({ciclo_us / 19e6 * 100:.4f}% de la ventana 40-59 s)")
+
+    if args.guardar:
+        with open(BASELINE_PATH, 'w') as archivo:
+            json.dump(resultados, archivo, indent=2, sort_keys=True)
+        logging.info(f"Línea base guardada en {BASELINE_PATH}")
+        return 0
+
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as archivo:
+            regresiones = comparar(resultados, json.load(archivo), args.tolerancia)
+        for regresion in regresiones:
+            logging.warning(f"Regresión: {regresion}")
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    sys.exit(main())
@@ -1,15 +1,23 @@
 import time
 import logging
-from iqoptionapi.stable_api import IQ_Option
-import datetime
+import functools
 import sys
+import threading
 from threading import Timer
 from colorama import init, Fore, Back
 from configobj import ConfigObj
-import joblib
-import pandas as pd
-import numpy as np
-from sklearn.preprocessing import LabelEncoder
+from stream import TickStream
+from settlement import SettlementTracker
+from model_store import ModelStore
+from scheduler import CandleScheduler
+from connection import ConnectionMonitor
+from tick_buffer import TickRingBuffer, COLORS, BLUE, RED
+from digits import ultimo_digito, inferir_precision
+from asset_catalog import AssetCatalog
+from journal import TradeJournal, TextJournal, crear_fila
+from tick_recorder import TickRecorder
+from metrics import (metrics, TICK_TO_ORDER_SECONDS, ORDER_TO_SETTLEMENT_SECONDS, DEADLINE_MISSES,
+                     TICKS, TRADES, PROFIT, STAGE_SECONDS)
 
 init(autoreset=True)
 green = Fore.GREEN
@@ -23,43 +31,37 @@ blue = Fore.BLUE
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
 
-lucro_total = 0
-total_wins = 0
-total_losses = 0
-total_ties = 0
-
-try:
-    model = joblib.load('digit_classifier.pkl')
-    le_color = joblib.load('le_color.pkl')
-    le_decision = joblib.load('le_decision.pkl')
-    le_result = joblib.load('le_result.pkl')
-    logging.info("Modelo y codificadores cargados correctamente.")
-except FileNotFoundError:
-    model = None
-    le_color = None
-    le_decision = None
-    le_result = None
-    logging.warning("Modelo o codificadores no encontrados. La IA no estará activa.")
+stats_lock = threading.Lock()
+journal_lock = threading.Lock()
+JOURNAL_BACKEND = 'sqlite'
+journal = None
+
+IA_ACTIVA = True
+modelos = ModelStore()
+
+def crear_api(email, password):
+    from iqoptionapi.stable_api import IQ_Option
+    return IQ_Option(email, password)
+
+def obtener_journal():
+    global journal
+    with journal_lock:
+        if journal is None:
+            journal = TextJournal() if JOURNAL_BACKEND == 'texto' else TradeJournal()
+    return journal
 
 def registrar_operacion(asset, action, resultado, lucro, digits_info, decision, pred_result=None, pred_prob=None):
-    digits_str = '; '.join([f"Tick {i+1}: Dígito={info['digit']} ({info['color']})" for i, info in enumerate(digits_info)])
-    pred_str = f" | Predicción IA: {pred_result} ({pred_prob:.2f})" if pred_result and pred_prob else ""
-    with open('historico_operaciones.txt', 'a') as archivo:
-        archivo.write(
-            f'{datetime.datetime.now()} | Activo: {asset} | Dirección: {action} | '
-            f'Resultado: {resultado} | Lucro/Pérdida: {lucro} | '
-            f'Análisis: [{digits_str}] | Decisión: {decision}{pred_str}\n'
-        )
+    obtener_journal().registrar(crear_fila(asset, action, resultado, lucro, digits_info, decision, pred_result, pred_prob))
 
 class NumberPressureBot:
-    def __init__(self, email, password, valor_entrada, asset, account_type="PRACTICE", api=None):
+    def __init__(self, email, password, valor_entrada, asset, account_type="PRACTICE", api=None, ingestion_mode="push", precision=None):
         self.email = email
         self.password = password
         self.api = api
         self.asset = self._validate_asset(asset)
         self.account_type = account_type
-        self.ticks = []
         self.max_ticks = 10
+        self.ticks = TickRingBuffer(self.max_ticks)
         self.analyze_ticks = 4
         self.candle_duration = 60
         self.trade_amount = float(valor_entrada)
@@ -67,16 +69,31 @@ class NumberPressureBot:
         self.check_time = 59
         self.tick_start_time = 40
         self.win_threshold = 0.6
+        self.ingestion_mode = ingestion_mode
+        self.precision = precision
+        self.recorder = None
+        self.ultimo_tick = None
+        self.fin_recoleccion = None
+        self.deadline_margin = 1.0
+        self.scheduler = CandleScheduler(self.candle_duration)
+        self.monitor = None
+        self.tick_stream = None
+        self.stop_event = threading.Event()
+        self.order_lock = threading.Lock()
+        self.dispatcher = None
+        self.mostrar_ticks = True
+        self.usar_tabla = True
+        self.usar_ia = IA_ACTIVA
+        self.settlement = None
 
     def _validate_asset(self, asset):
         if not self.api:
             raise ValueError("API no está inicializada. Conéctese primero.")
         
         asset = asset.strip().upper()
-        activos = self.api.get_all_ACTIVES_OPCODE()
-        valid_assets = [activo.upper() for activo in activos.keys()]
-        
-        if asset not in valid_assets:
+        self.catalogo = AssetCatalog.compartido(self.api)
+
+        if asset not in self.catalogo:
             suggested_asset = 'USDZAR-OTC' if asset == 'USZAR-OTC' else None
             error_msg = f"Activo inválido: {asset}. Ejemplos de activos válidos: USDZAR-OTC, EURJPY-OTC, EURUSD-OTC."
             if suggested_asset:
@@ -86,7 +103,7 @@ class NumberPressureBot:
 
     def connect(self):
         if not self.api:
-            self.api = IQ_Option(self.email, self.password)
+            self.api = crear_api(self.email, self.password)
         check, reason = self.api.connect()
         if check:
             logging.info("Conexión exitosa.")
@@ -100,7 +117,8 @@ class NumberPressureBot:
     def check_connect(self):
         if not self.api.check_connect():
             logging.info("Intentando reconectar...")
-            check, reason = self.api.connect()
+            with self.order_lock:
+                check, reason = self.api.connect()
             if check:
                 logging.info("Reconexión exitosa.")
                 self.api.change_balance(self.account_type)
@@ -112,16 +130,25 @@ class NumberPressureBot:
         return True
 
     def sincronizar_activos(self):
-        logging.info("Sincronizando activos con IQ Option...")
-        self.api.update_ACTIVES_OPCODE()
-        activos = self.api.get_all_ACTIVES_OPCODE()
-        logging.info("Activos sincronizados correctamente.")
-        instrument_type = "binary-option"
-        self.api.subscribe_top_assets_updated(instrument_type)
-        logging.info("Esperando la actualización de activos...")
-        return activos
+        self.catalogo.refresh()
+        self.catalogo.suscribir_top_assets("binary-option")
+        return self.catalogo.activos
+
+    def detectar_precision(self):
+        if self.precision is None:
+            self.precision = self.catalogo.precision(self.asset)
+        if self.precision is None:
+            candles = self.api.get_realtime_candles(self.asset, self.candle_duration)
+            if candles:
+                self.precision = inferir_precision([c['close'] for c in candles.values()])
+        if self.precision is None:
+            logging.warning(f"Precisión desconocida para {self.asset}, se usará el precio textual.")
+        else:
+            logging.info(f"Precisión de {self.asset}: {self.precision} decimales")
 
     def get_last_digit(self, price):
+        if self.precision is not None:
+            return ultimo_digito(price, self.precision)
         price_str = str(price)
         if len(price_str) >= 2 and '.' in price_str:
             decimal_part = price_str.split('.')[-1]
@@ -135,45 +162,32 @@ class NumberPressureBot:
         return digit % 2 != 0
 
     def predict_result(self, digits_info, decision):
-        if model is None:
+        if not self.usar_ia:
             return None, None
 
-        try:
-            data = {
-                'digit1': digits_info[0]['digit'], 'color1': le_color.transform([digits_info[0]['color']])[0],
-                'digit2': digits_info[1]['digit'], 'color2': le_color.transform([digits_info[1]['color']])[0],
-                'digit3': digits_info[2]['digit'], 'color3': le_color.transform([digits_info[2]['color']])[0],
-                'digit4': digits_info[3]['digit'], 'color4': le_color.transform([digits_info[3]['color']])[0],
-                'decision': le_decision.transform([decision])[0]
-            }
-            df = pd.DataFrame([data])
-
-            pred = model.predict(df)[0]
-            pred_proba = model.predict_proba(df)[0]
-            pred_result = le_result.inverse_transform([pred])[0]
-            win_prob = pred_proba[le_result.transform(['WIN'])[0]]
-
-            return pred_result, win_prob
-        except Exception as e:
-            logging.error(f"Error en la predicción: {e}")
+        modelo = modelos.obtener()
+        if modelo is None:
+            if modelos.cargando:
+                logging.warning("El modelo aún se está cargando, se decide sin IA.")
             return None, None
+        return modelo.predecir(digits_info, decision, self.usar_tabla)
 
     def analyze_pressure(self):
         if len(self.ticks) < self.max_ticks:
             print(f"{yellow} >> No hay suficientes ticks para el análisis ({len(self.ticks)}/{self.max_ticks})")
             return None, [], "No se realiza operación"
 
-        recent_ticks = self.ticks[-self.analyze_ticks:]
-        if len(recent_ticks) < self.analyze_ticks:
-            print(f"{yellow} >> No hay suficientes ticks recientes para el análisis ({len(recent_ticks)}/{self.analyze_ticks})")
+        _, recent_digits, recent_colors = self.ticks.last(self.analyze_ticks)
+        if len(recent_digits) < self.analyze_ticks:
+            print(f"{yellow} >> No hay suficientes ticks recientes para el análisis ({len(recent_digits)}/{self.analyze_ticks})")
             return None, [], "No se realiza operación"
 
-        digits = [self.get_last_digit(tick['price']) for tick in recent_ticks]
-        colors = [tick['color'] for tick in recent_ticks]
+        digits = recent_digits.tolist()
+        colors = [COLORS[c] for c in recent_colors]
         digits_info = [{'digit': digit, 'color': color} for digit, color in zip(digits, colors)]
 
         print(f"{blue}{'=' * 30}")
-        print(f"{yellow}Análisis (Segundo {self.check_time}):")
+        print(f"{yellow}Análisis (Segundo {self.tiempos_ciclo()[1]}):")
         for i, (digit, color) in enumerate(zip(digits, colors)):
             color_text = blue if color == 'blue' else red
             print(f"{white}Tick {i+1}: Penúltimo Dígito={color_text}{digit}{white}")
@@ -195,7 +209,7 @@ class NumberPressureBot:
 
         interrupted = False
         interruption_details = []
-        for i in range(max_index + 1, len(recent_ticks)):
+        for i in range(max_index + 1, len(digits)):
             curr_digit = digits[i]
             curr_color = colors[i]
             curr_is_odd = self.is_odd(curr_digit)
@@ -236,37 +250,52 @@ class NumberPressureBot:
             print(f"{yellow}Decisión: No se realiza operación.")
             return None, digits_info, "No se realiza operación"
 
-    def place_trade(self, action, digits_info, decision, pred_result, pred_prob):
-        global lucro_total, total_wins, total_losses, total_ties
+    def liquidar_operacion(self, action, digits_info, decision, pred_result, pred_prob, resultado, enviada=None):
+        if enviada is not None:
+            ORDER_TO_SETTLEMENT_SECONDS.observe(time.perf_counter() - enviada, asset=self.asset)
+        lucro = round(resultado, 2)
+        etiqueta = 'WIN' if resultado > 0 else 'LOSS' if resultado < 0 else 'EMPATE'
+
+        with stats_lock:
+            TRADES.inc(asset=self.asset, result=etiqueta)
+            PROFIT.inc(lucro, asset=self.asset)
+            lucro_total = PROFIT.value()
+            if etiqueta == 'WIN':
+                print(f"{green}>> Resultado: WIN \n>> Lucro: {lucro} \n>> Activo: {self.asset} \n>> Lucro total: {round(lucro_total, 2)}")
+            elif etiqueta == 'LOSS':
+                print(f"{red}>> Resultado: LOSS \n>> Pérdida: {lucro} \n>> Activo: {self.asset} \n>> Lucro total: {round(lucro_total, 2)}")
+            else:
+                print(f"{yellow}>> Resultado: EMPATE \n>> Lucro: {lucro} \n>> Activo: {self.asset} \n>> Lucro total: {round(lucro_total, 2)}")
+            registrar_operacion(self.asset, action, etiqueta, lucro, digits_info, decision, pred_result, pred_prob)
 
-        if not self.check_connect():
+            print(f"{white}Recuento general - Wins: {TRADES.value(result='WIN')}, Losses: {TRADES.value(result='LOSS')}, Ties: {TRADES.value(result='EMPATE')}")
+
+    def place_trade(self, action, digits_info, decision, pred_result, pred_prob):
+        with metrics.span('conexion', asset=self.asset):
+            conectado = self.monitor.saludable if self.monitor else self.check_connect()
+        if not conectado:
+            logging.error(f"Conexión no disponible, se descarta la operación en {self.asset}.")
             return False
 
-        check, order_id = self.api.buy(self.trade_amount, self.asset, action, self.expiration_mode)
+        with metrics.span('orden', asset=self.asset):
+            if self.dispatcher:
+                check, order_id = self.dispatcher.buy(self.trade_amount, self.asset, action, self.expiration_mode)
+            else:
+                with self.order_lock:
+                    check, order_id = self.api.buy(self.trade_amount, self.asset, action, self.expiration_mode)
+        enviada = time.perf_counter()
+        if self.ultimo_tick is not None:
+            TICK_TO_ORDER_SECONDS.observe(enviada - self.ultimo_tick, asset=self.asset)
+        if self.fin_recoleccion is not None and enviada - self.fin_recoleccion > self.deadline_margin:
+            DEADLINE_MISSES.inc(asset=self.asset)
+            logging.warning(f"Orden de {self.asset} enviada {enviada - self.fin_recoleccion:.3f}s después del plazo.")
         if check:
             logging.info(f"Operación {action} realizada con ID: {order_id}")
             print(f"{green}Operación {action.upper()} realizada con ID: {order_id}")
-
-            while True:
-                time.sleep(0.1)
-                status, resultado = self.api.check_win_v4(order_id)
-                if status:
-                    lucro_total += round(resultado, 2)
-                    if resultado > 0:
-                        total_wins += 1
-                        print(f"{green}>> Resultado: WIN \n>> Lucro: {round(resultado, 2)} \n>> Activo: {self.asset} \n>> Lucro total: {round(lucro_total, 2)}")
-                        registrar_operacion(self.asset, action, 'WIN', round(resultado, 2), digits_info, decision, pred_result, pred_prob)
-                    elif resultado < 0:
-                        total_losses += 1
-                        print(f"{red}>> Resultado: LOSS \n>> Pérdida: {round(resultado, 2)} \n>> Activo: {self.asset} \n>> Lucro total: {round(lucro_total, 2)}")
-                        registrar_operacion(self.asset, action, 'LOSS', round(resultado, 2), digits_info, decision, pred_result, pred_prob)
-                    else:
-                        total_ties += 1
-                        print(f"{yellow}>> Resultado: EMPATE \n>> Lucro: {round(resultado, 2)} \n>> Activo: {self.asset} \n>> Lucro total: {round(lucro_total, 2)}")
-                        registrar_operacion(self.asset, action, 'EMPATE', round(resultado, 2), digits_info, decision, pred_result, pred_prob)
-                    
-                    print(f"{white}Recuento general - Wins: {total_wins}, Losses: {total_losses}, Ties: {total_ties}")
-                    break
+            if self.settlement is None:
+                self.settlement = SettlementTracker(self.api)
+            self.settlement.submit(order_id, functools.partial(
+                self.liquidar_operacion, action, digits_info, decision, pred_result, pred_prob, enviada=enviada))
             return True
         else:
             logging.error("Fallo al realizar la operación")
@@ -275,68 +304,164 @@ class NumberPressureBot:
             return False
 
     def process_tick(self, tick_data):
+        inicio = time.perf_counter()
         price = tick_data['price']
-        color = 'blue' if len(self.ticks) == 0 or price >= self.ticks[-1]['price'] else 'red'
-        self.ticks.append({'price': price, 'color': color})
+        last_price = self.ticks.last_price
+        color = BLUE if last_price is None or price >= last_price else RED
         digit = self.get_last_digit(price)
-        color_text = blue if color == 'blue' else red
-        print(f"{white}T. recibido: Precio={color_text}{price}{white}, U. Dígito={color_text}{digit}{white}")
-        if len(self.ticks) > self.max_ticks:
-            self.ticks.pop(0)
+        self.ticks.push(price, digit, color, tick_data.get('timestamp', 0.0))
+        if self.mostrar_ticks:
+            color_text = blue if color == BLUE else red
+            print(f"{white}T. recibido: Precio={color_text}{price}{white}, U. Dígito={color_text}{digit}{white}")
+        self.ultimo_tick = time.perf_counter()
+        TICKS.inc(asset=self.asset)
+        STAGE_SECONDS.observe(self.ultimo_tick - inicio, stage='tick', asset=self.asset)
+
+    def reiniciar_ticks(self):
+        if self.ticks.capacity != self.max_ticks:
+            self.ticks = TickRingBuffer(self.max_ticks)
+        else:
+            self.ticks.clear()
+
+    def tiempos_ciclo(self):
+        """Segundos de la vela en que empieza la recolección y se decide.
+
+        tick_start_time y check_time se expresan para velas de 60 s; con otra
+        candle_duration se mantienen a la misma distancia del cierre de la vela.
+        """
+        if self.candle_duration == 60:
+            return self.tick_start_time, self.check_time
+        check = self.candle_duration - (60 - self.check_time)
+        return max(check - (self.check_time - self.tick_start_time), 0), check
+
+    def recolectar_ticks(self, fin=None):
+        if fin is None:
+            inicio, decision = self.tiempos_ciclo()
+            fin = self.scheduler.server_now() + decision - inicio
+        deadline = self.scheduler.to_monotonic(fin)
+        if self.ingestion_mode == "poll":
+            grabado = None
+            while time.monotonic() < deadline:
+                candles = self.api.get_realtime_candles(self.asset, self.candle_duration)
+                candle = candles[max(candles.keys())]
+                timestamp = candle.get('at', 0) / 1e9
+                self.scheduler.sync(timestamp)
+                self.process_tick({'price': candle['close']})
+                if self.recorder and (timestamp, candle['close']) != grabado:
+                    grabado = (timestamp, candle['close'])
+                    self.recorder.record(self.asset, timestamp or time.time(), candle['close'])
+                self.stop_event.wait(min(1, max(deadline - time.monotonic(), 0)))
+            self.fin_recoleccion = time.perf_counter()
+            return
+
+        self.tick_stream.clear()
+        while True:
+            restante = deadline - time.monotonic()
+            if restante <= 0:
+                break
+            tick = self.tick_stream.get(restante)
+            if tick:
+                self.process_tick(tick)
+        self.fin_recoleccion = time.perf_counter()
+
+    def iniciar_stream(self):
+        self.api.start_candles_stream(self.asset, self.candle_duration, self.max_ticks)
+        if self.scheduler is None or self.scheduler.candle_duration != self.candle_duration:
+            self.scheduler = CandleScheduler(self.candle_duration)
+        if hasattr(self.api, 'get_server_timestamp'):
+            self.scheduler.sync(self.api.get_server_timestamp())
+        self.detectar_precision()
+        if self.ingestion_mode != "poll":
+            self.tick_stream = TickStream(self.api, self.asset, self.candle_duration, recorder=self.recorder,
+                                          scheduler=self.scheduler)
+            self.tick_stream.start()
+        logging.info(f"Stream iniciado para {self.asset}")
+        print(f"{green}Stream iniciado para {self.asset}")
+
+    def detener_stream(self):
+        if self.tick_stream:
+            self.tick_stream.stop()
+        self.api.stop_candles_stream(self.asset, self.candle_duration)
+        logging.info(f"Stream detenido para {self.asset}.")
+        print(f"{yellow}Stream detenido para {self.asset}.")
+
+    def cambiar_api(self, api):
+        """Pasa el bot a otra sesión ya autenticada y vuelve a abrir su stream en ella."""
+        if self.tick_stream:
+            self.tick_stream.stop()
+        self.api = api
+        self.catalogo = AssetCatalog.compartido(api)
+        if self.settlement:
+            self.settlement.api = api
+        self.iniciar_stream()
+
+    def ciclo(self, fin=None):
+        print(f"{blue}{'=' * 30}")
+        print(f"{yellow}Iniciando recolección de ticks {self.asset} (Segundo {self.tiempos_ciclo()[0]}):")
+        self.reiniciar_ticks()
+        if self.usar_ia:
+            modelos.promover()
+        self.recolectar_ticks(fin)
+        with metrics.span('analisis', asset=self.asset):
+            action, digits_info, decision = self.analyze_pressure()
+        pred_result, pred_prob = None, None
+        if action:
+            with metrics.span('prediccion', asset=self.asset):
+                pred_result, pred_prob = self.predict_result(digits_info, decision)
+            if pred_result:
+                print(f"{yellow}Predicción IA: {pred_result} con probabilidad de WIN: {pred_prob:.2f}")
+                if pred_result == 'WIN' and pred_prob >= self.win_threshold:
+                    logging.info(f"Estrategia cumplida y aprobada por IA, ejecutando operación: {action}")
+                    self.place_trade(action, digits_info, decision, pred_result, pred_prob)
+                else:
+                    logging.info("IA desaconseja operar debido a baja probabilidad de WIN.")
+                    print(f"{red}IA desaconseja operar.")
+                    registrar_operacion(self.asset, action, 'NONE', 0, digits_info, decision, pred_result, pred_prob)
+            else:
+                logging.info(f"Estrategia cumplida, ejecutando operación sin IA: {action}")
+                self.place_trade(action, digits_info, decision, pred_result, pred_prob)
+        else:
+            logging.info("Estrategia no cumplida, no se realiza operación.")
+            registrar_operacion(self.asset, 'None', 'NONE', 0, digits_info, decision, pred_result, pred_prob)
+
+    def ejecutar_ciclos(self):
+        while not self.stop_event.is_set():
+            inicio, decision = self.tiempos_ciclo()
+            objetivo = self.scheduler.proximo(inicio)
+            if not self.scheduler.esperar(objetivo, self.stop_event):
+                break
+            try:
+                self.ciclo(objetivo + decision - inicio)
+            except Exception as e:
+                logging.error(f"Error en el ciclo de {self.asset}: {e}")
 
     def run(self):
+        if self.usar_ia:
+            modelos.cargar_en_segundo_plano()
+            modelos.vigilar()
         if not self.connect():
             logging.error("No se pudo iniciar el bot debido a problemas de conexión.")
             print(f"{red}No se pudo iniciar el bot debido a problemas de conexión.")
             return
 
         activos = self.sincronizar_activos()
-        self.api.start_candles_stream(self.asset, self.candle_duration, self.max_ticks)
-        logging.info(f"Stream iniciado para {self.asset}")
-        print(f"{green}Stream iniciado para {self.asset}")
+        self.iniciar_stream()
+        if self.monitor is None:
+            self.monitor = ConnectionMonitor(self.api, self.account_type, lock=self.order_lock)
+            self.monitor.on_swap.append(self.cambiar_api)
+        self.monitor.start()
 
         try:
-            while True:
-                current_second = datetime.datetime.now().second
-                if current_second == self.tick_start_time:
-                    print(f"{blue}{'=' * 30}")
-                    print(f"{yellow}Iniciando recolección de ticks (Segundo {current_second}):")
-                    self.ticks = []
-                    candles = self.api.get_realtime_candles(self.asset, self.candle_duration)
-                    start_time = time.time()
-                    while time.time() - start_time < (self.check_time - self.tick_start_time):
-                        candles = self.api.get_realtime_candles(self.asset, self.candle_duration)
-                        latest_timestamp = max(candles.keys())
-                        self.process_tick({'price': candles[latest_timestamp]['close']})
-                        time.sleep(1)
-                    action, digits_info, decision = self.analyze_pressure()
-                    pred_result, pred_prob = None, None
-                    if action:
-                        pred_result, pred_prob = self.predict_result(digits_info, decision)
-                        if pred_result:
-                            print(f"{yellow}Predicción IA: {pred_result} con probabilidad de WIN: {pred_prob:.2f}")
-                            if pred_result == 'WIN' and pred_prob >= self.win_threshold:
-                                logging.info(f"Estrategia cumplida y aprobada por IA, ejecutando operación: {action}")
-                                self.place_trade(action, digits_info, decision, pred_result, pred_prob)
-                            else:
-                                logging.info("IA desaconseja operar debido a baja probabilidad de WIN.")
-                                print(f"{red}IA desaconseja operar.")
-                                registrar_operacion(self.asset, action, 'NONE', 0, digits_info, decision, pred_result, pred_prob)
-                        else:
-                            logging.info(f"Estrategia cumplida, ejecutando operación sin IA: {action}")
-                            self.place_trade(action, digits_info, decision, pred_result, pred_prob)
-                    else:
-                        logging.info("Estrategia no cumplida, no se realiza operación.")
-                        registrar_operacion(self.asset, 'None', 'NONE', 0, digits_info, decision, pred_result, pred_prob)
-                    time.sleep(self.candle_duration - self.check_time + 1)
-                time.sleep(0.1)
+            self.ejecutar_ciclos()
         except KeyboardInterrupt:
             logging.info("Bot detenido por el usuario.")
             print(f"{yellow}Bot detenido por el usuario.")
         finally:
-            self.api.stop_candles_stream(self.asset, self.candle_duration)
-            logging.info("Stream detenido.")
-            print(f"{yellow}Stream detenido.")
+            self.monitor.stop()
+            modelos.detener()
+            self.detener_stream()
+            if self.settlement:
+                self.settlement.stop(timeout=self.candle_duration * self.expiration_mode + 10)
 
 def select_account_type():
     while True:
@@ -373,17 +498,38 @@ def main():
     print(f"{white}Valor de entrada: {valor_entrada}")
     print(f"{blue}{'-' * 50}")
 
-    api = IQ_Option(email, password)
+    ajustes = config['AJUSTES']
+    global IA_ACTIVA, JOURNAL_BACKEND
+    IA_ACTIVA = ajustes.as_bool('ia') if 'ia' in ajustes else True
+    JOURNAL_BACKEND = ajustes.get('journal', 'sqlite')
+    if JOURNAL_BACKEND not in ('sqlite', 'texto'):
+        print(f"{yellow}Diario '{JOURNAL_BACKEND}' desconocido, se usa sqlite.")
+        JOURNAL_BACKEND = 'sqlite'
+    if IA_ACTIVA:
+        modelos.cargar_en_segundo_plano()
+    if ajustes.get('metricas_puerto'):
+        metrics.serve(int(ajustes['metricas_puerto']))
+    if ajustes.get('metricas_archivo'):
+        metrics.write_snapshots(ajustes['metricas_archivo'], float(ajustes.get('metricas_intervalo', 10)))
+    recorder = TickRecorder(ajustes['grabar_ticks']) if ajustes.get('grabar_ticks') else None
+
+    api = crear_api(email, password)
     if not api.connect():
         print(f"{red}Error: No se pudo conectar con la API de IQ Option.")
         sys.exit()
 
     while True:
         try:
-            asset = input(f"{yellow} >> {white}Seleccione el activo (por ejemplo, USDZAR-OTC, EURJPY-OTC, etc.): {green}").strip()
+            asset = input(f"{yellow} >> {white}Seleccione el activo o varios separados por comas (por ejemplo, USDZAR-OTC, EURJPY-OTC, etc.): {green}").strip()
             print(f"{white}", end='')
             account_type = select_account_type()
+            assets = [a for a in asset.split(',') if a.strip()]
+            if len(assets) > 1:
+                from supervisor import MultiAssetSupervisor
+                MultiAssetSupervisor(email, password, valor_entrada, assets, account_type, api, recorder=recorder).run()
+                break
             bot = NumberPressureBot(email, password, valor_entrada, asset, account_type, api)
+            bot.recorder = recorder
             print(f"{yellow}Activo seleccionado: {bot.asset}")
             bot.run()
             break
@@ -0,0 +1,77 @@
+import logging
+import threading
+
+
+class ConnectionMonitor:
+    """Vigila la sesión de IQ Option en segundo plano y reconecta antes de que haga falta.
+
+    El camino de las órdenes solo consulta `saludable`, que se actualiza con cada
+    latido. Reconectar reemplaza api.api y sus buffers, así que se hace bajo `lock`
+    (el lock compartido de la API) y después los callbacks de on_swap reciben la API
+    para volver a abrir sus streams. No hay conexión de reserva en el mismo proceso:
+    iqoptionapi guarda el estado del websocket en el módulo global_value, de modo que
+    un segundo IQ_Option compartiría el indicador de conexión y el mutex de envío de
+    la sesión principal.
+    """
+
+    def __init__(self, api, account_type, interval=5.0, lock=None):
+        self.api = api
+        self.account_type = account_type
+        self.interval = interval
+        self.lock = lock or threading.Lock()
+        self.saludable = True
+        self.on_swap = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="conexion", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _conectar(self, api):
+        check, reason = api.connect()
+        if check:
+            api.change_balance(self.account_type)
+        else:
+            logging.error(f"Conexión fallida: {reason}")
+        return check
+
+    def _cambiar(self, api):
+        self.api = api
+        for callback in self.on_swap:
+            try:
+                callback(api)
+            except Exception as e:
+                logging.error(f"Error al cambiar de conexión: {e}")
+
+    def latido(self):
+        try:
+            if self.api.check_connect():
+                self.saludable = True
+            else:
+                self.saludable = False
+                logging.info("Latido fallido, reconectando en segundo plano...")
+                with self.lock:
+                    reconectada = self._conectar(self.api)
+                if reconectada:
+                    logging.info("Reconexión exitosa.")
+                    self._cambiar(self.api)
+                    self.saludable = True
+        except Exception as e:
+            logging.error(f"Error en el latido de conexión: {e}")
+            self.saludable = False
+        return self.saludable
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.latido()
+            self._stop.wait(self.interval)
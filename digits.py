@@ -0,0 +1,45 @@
+import numpy as np
+
+MAX_PRECISION = 8
+
+
+def ultimo_digito(price, precision):
+    """Penúltimo decimal del precio expresado con `precision` decimales, por escalado entero."""
+    scaled = int(round(price * 10 ** precision))
+    if precision >= 2:
+        return (scaled // 10) % 10
+    if precision == 1:
+        return scaled % 10
+    return 0
+
+
+def ultimos_digitos(prices, precision):
+    """Versión vectorizada de ultimo_digito para un array de precios."""
+    scaled = np.rint(np.asarray(prices, dtype=np.float64) * 10 ** precision).astype(np.int64)
+    if precision >= 2:
+        return ((scaled // 10) % 10).astype(np.int8)
+    if precision == 1:
+        return (scaled % 10).astype(np.int8)
+    return np.zeros(len(scaled), dtype=np.int8)
+
+
+def inferir_precision(prices):
+    """Estima los decimales del instrumento como el máximo observado en una muestra de precios."""
+    precision = None
+    for price in prices:
+        for p in range(MAX_PRECISION + 1):
+            if abs(price * 10 ** p - round(price * 10 ** p)) < 1e-6:
+                break
+        precision = p if precision is None else max(precision, p)
+    return precision
+
+
+def precisiones_por_opcode(init_info):
+    """Decimales de cada activo, indexados por opcode (str), a partir de get_all_init_v2()."""
+    precisiones = {}
+    for option in ('binary', 'turbo'):
+        for active_id, info in init_info.get(option, {}).get('actives', {}).items():
+            if 'precision' in info:
+                precisiones[str(active_id)] = int(info['precision'])
+    return precisiones
+
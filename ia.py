@@ -1,56 +1,163 @@
+import argparse
+import math
+import numpy as np
 import pandas as pd
 import re
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV, PredefinedSplit
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report
 import joblib
+import json
 import logging
+import os
+import shutil
+import time
+from journal import leer_operaciones
+from model_store import ARTEFACTOS, DIRECTORIO_VERSIONES, MANIFIESTO, hash_archivo, leer_manifiesto
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
 
-def parse_historico(file_path='historico_operaciones.txt'):
-    """Lee el archivo historico_operaciones.txt y extrae los datos relevantes."""
-    data = []
-    with open(file_path, 'r') as file:
-        for line in file:
-            # Extraer dígitos y colores usando expresiones regulares
-            digits_match = re.search(r'Análisis: \[(.*?)\]', line)
-            result_match = re.search(r'Resultado: (\w+)', line)
-            decision_match = re.search(r'Decisión: (.+?)(?:\n|$)', line)
-
-            if digits_match and result_match:
-                digits_str = digits_match.group(1)
-                result = result_match.group(1)
-                decision = decision_match.group(1) if decision_match else 'No se realiza operación'
-
-                # Solo procesar operaciones con resultado WIN, LOSS o EMPATE
-                if result in ['WIN', 'LOSS', 'EMPATE']:
-                    # Extraer dígitos y colores
-                    ticks = digits_str.split('; ')
-                    digits = []
-                    colors = []
-                    for tick in ticks:
-                        digit = re.search(r'Dígito=(\d+)', tick).group(1)
-                        color = re.search(r'\((\w+)\)', tick).group(1)
-                        digits.append(int(digit))
-                        colors.append(color)
-
-                    # Crear fila de datos
-                    row = {
-                        'digit1': digits[0], 'color1': colors[0],
-                        'digit2': digits[1], 'color2': colors[1],
-                        'digit3': digits[2], 'color3': colors[2],
-                        'digit4': digits[3], 'color4': colors[3],
-                        'decision': decision,
-                        'result': result
-                    }
-                    data.append(row)
-
-    return pd.DataFrame(data)
-
-def preprocess_data(df):
-    """Preprocesa los datos para el modelo."""
+COLUMNAS_HISTORICO = ['digit1', 'color1', 'digit2', 'color2', 'digit3', 'color3', 'digit4', 'color4', 'decision', 'result']
+RESULTADOS_VALIDOS = ('WIN', 'LOSS', 'EMPATE')
+TIPOS_HISTORICO = {c: ('int8' if c.startswith('digit') else 'category') for c in COLUMNAS_HISTORICO}
+LINEA_RE = re.compile(r'Resultado: (\w+)[^\n]*?Análisis: \[([^\]\n]*)\](?:[^\n]*?Decisión: ([^|\n]*))?')
+TICK_RE = re.compile(r'Dígito=(\d+) \((\w+)\)')
+FIRMA_BYTES = 4096
+COLUMNAS_MODELO = COLUMNAS_HISTORICO[:-1]
+MODOS_ENTRENAMIENTO = ('completo', 'halving', 'incremental')
+FOLDS_CACHE = 'folds_cache.pkl'
+N_FOLDS = 5
+MAX_ESTIMADORES = 500
+PASO_ESTIMADORES = 10
+VERSIONES_CONSERVADAS = 3
+PARAMETROS_DEFECTO = {'n_estimators': 100, 'max_depth': None, 'min_samples_split': 2}
+
+def _firma(file_path):
+    with open(file_path, 'rb') as file:
+        return file.read(FIRMA_BYTES)
+
+def _parsear_texto(texto, columnas):
+    for match in LINEA_RE.finditer(texto):
+        result = match.group(1)
+        # Solo procesar operaciones con resultado WIN, LOSS o EMPATE
+        if result not in RESULTADOS_VALIDOS:
+            continue
+        ticks = TICK_RE.findall(match.group(2))
+        if len(ticks) < 4:
+            continue
+        for i, (digit, color) in enumerate(ticks[:4]):
+            columnas[f'digit{i+1}'].append(int(digit))
+            columnas[f'color{i+1}'].append(color)
+        decision = match.group(3)
+        columnas['decision'].append(decision.strip() if decision else 'No se realiza operación')
+        columnas['result'].append(result)
+
+def parse_historico(file_path='historico_operaciones.txt', cache_path='historico_cache.pkl', chunk_size=1 << 20):
+    """Lee historico_operaciones.txt de forma incremental y extrae los datos relevantes.
+
+    Guarda en cache_path el offset en bytes ya procesado junto con el dataset acumulado,
+    de modo que cada ejecución solo parsea las líneas añadidas desde la anterior.
+    """
+    firma = _firma(file_path)
+    offset = 0
+    previo = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            cache = joblib.load(cache_path)
+            if cache['firma'] == firma[:len(cache['firma'])] and cache['offset'] <= os.path.getsize(file_path):
+                offset = cache['offset']
+                previo = cache['data']
+            else:
+                logging.info("El histórico cambió desde el último checkpoint, se vuelve a procesar completo.")
+        except Exception as e:
+            logging.warning(f"Checkpoint del histórico no válido, se ignora: {e}")
+
+    columnas = {c: [] for c in COLUMNAS_HISTORICO}
+    with open(file_path, 'rb') as file:
+        file.seek(offset)
+        resto = b''
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            chunk = resto + chunk
+            corte = chunk.rfind(b'\n') + 1
+            resto = chunk[corte:]
+            _parsear_texto(chunk[:corte].decode('utf-8', errors='replace'), columnas)
+            offset += corte
+
+    nuevos = pd.DataFrame(columnas).astype(TIPOS_HISTORICO)
+    df = nuevos if previo is None else pd.concat([previo, nuevos], ignore_index=True).astype(TIPOS_HISTORICO)
+    logging.info(f"Histórico: {len(nuevos)} operaciones nuevas, {len(df)} en total.")
+
+    if cache_path:
+        tmp_path = f'{cache_path}.tmp'
+        joblib.dump({'firma': firma, 'offset': offset, 'data': df}, tmp_path)
+        os.replace(tmp_path, cache_path)
+    return df.copy()
+
+def guardar_artefacto(obj, path):
+    """Escribe el artefacto en un temporal y lo renombra, para que el bot nunca lea un pickle a medias."""
+    tmp_path = f'{path}.tmp'
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+def clases_codificadores(directorio='.'):
+    """Clases de los codificadores guardados, para detectar si cambió la codificación entre entrenamientos."""
+    return {nombre: [str(c) for c in joblib.load(os.path.join(directorio, f'le_{nombre}.pkl')).classes_]
+            for nombre in ('color', 'decision', 'result')}
+
+def nueva_version():
+    return time.strftime('%Y%m%d%H%M%S') + f'-{time.time_ns() % 10**9:09d}'
+
+def directorio_modelo(manifiesto):
+    """Directorio con los artefactos de la versión del manifiesto ('.' para los artefactos sin versionar)."""
+    return (manifiesto or {}).get('directorio') or '.'
+
+def escribir_manifiesto(filas, path=MANIFIESTO, version=None, **extra):
+    """Publica una versión nueva del modelo; se escribe al final, cuando todos los artefactos están en disco."""
+    manifiesto = {'version': version or nueva_version(), 'creado': time.time(), 'filas': filas, **extra}
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as archivo:
+        json.dump(manifiesto, archivo)
+    os.replace(tmp_path, path)
+    return manifiesto
+
+def publicar_version(staging, version, filas, **extra):
+    """Mueve los artefactos entrenados a modelos/<version>/ y publica el manifiesto con sus hashes.
+
+    Los artefactos de una versión publicada no se vuelven a escribir, así que el bot
+    nunca mezcla codificadores nuevos con un modelo anterior.
+    """
+    directorio = os.path.join(DIRECTORIO_VERSIONES, version)
+    hashes = {nombre: hash_archivo(os.path.join(staging, nombre)) for nombre in ARTEFACTOS.values()}
+    os.replace(staging, directorio)
+    manifiesto = escribir_manifiesto(filas, version=version, directorio=directorio, sha256=hashes, **extra)
+    limpiar_versiones(directorio)
+    return manifiesto
+
+def limpiar_versiones(vigente, conservar=VERSIONES_CONSERVADAS):
+    versiones = sorted(d for d in os.listdir(DIRECTORIO_VERSIONES)
+                       if os.path.isdir(os.path.join(DIRECTORIO_VERSIONES, d)) and not d.endswith('.tmp'))
+    for version in versiones[:-conservar]:
+        ruta = os.path.join(DIRECTORIO_VERSIONES, version)
+        if ruta != vigente:
+            shutil.rmtree(ruta, ignore_errors=True)
+
+def cargar_datos(file_path='historico_operaciones.txt', journal_path='historico_operaciones.db'):
+    """Une el histórico de texto con las operaciones del diario SQLite, si existen."""
+    frames = []
+    if os.path.exists(file_path):
+        frames.append(parse_historico(file_path))
+    if os.path.exists(journal_path):
+        frames.append(leer_operaciones(journal_path)[['digit1', 'color1', 'digit2', 'color2', 'digit3', 'color3',
+                                                      'digit4', 'color4', 'decision', 'result']])
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def preprocess_data(df, directorio='.'):
+    """Preprocesa los datos para el modelo y guarda los codificadores en `directorio`."""
     # Codificar colores y decisión
     le_color = LabelEncoder()
     le_decision = LabelEncoder()
@@ -64,59 +171,198 @@ def preprocess_data(df):
     df['result'] = le_result.fit_transform(df['result'])
 
     # Guardar los codificadores para usarlos en predicciones futuras
-    joblib.dump(le_color, 'le_color.pkl')
-    joblib.dump(le_decision, 'le_decision.pkl')
-    joblib.dump(le_result, 'le_result.pkl')
+    guardar_artefacto(le_color, os.path.join(directorio, 'le_color.pkl'))
+    guardar_artefacto(le_decision, os.path.join(directorio, 'le_decision.pkl'))
+    guardar_artefacto(le_result, os.path.join(directorio, 'le_result.pkl'))
 
     return df, le_result
 
-def train_model(df, le_result):
-    """Entrena un modelo Random Forest con validación cruzada y optimización de hiperparámetros."""
-    X = df[['digit1', 'color1', 'digit2', 'color2', 'digit3', 'color3', 'digit4', 'color4', 'decision']]
-    y = df['result']
+def asignar_folds(y, n_folds=N_FOLDS, cache_path=FOLDS_CACHE):
+    """Fold estratificado de cada fila. Las filas ya vistas conservan su fold entre entrenamientos
+    y solo se reparten las nuevas, de modo que la partición queda cacheada en disco."""
+    y = np.asarray(y)
+    folds = np.empty(0, dtype=np.int8)
+    previo = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            previo = joblib.load(cache_path)
+        except Exception as e:
+            logging.warning(f"Caché de folds no válida, se regenera: {e}")
+    if (previo and previo['n_folds'] == n_folds and len(previo['y']) <= len(y)
+            and np.array_equal(previo['y'], y[:len(previo['y'])])):
+        folds = previo['folds']
+    n = len(folds)
+    if n < len(y):
+        rng = np.random.default_rng(n)
+        nuevos = np.empty(len(y) - n, dtype=np.int8)
+        for clase in np.unique(y[n:]):
+            idx = np.flatnonzero(y[n:] == clase)
+            inicio = np.count_nonzero(y[:n] == clase)
+            nuevos[rng.permutation(idx)] = (inicio + np.arange(len(idx))) % n_folds
+        folds = np.concatenate([folds, nuevos])
+        if cache_path:
+            guardar_artefacto({'n_folds': n_folds, 'y': y, 'folds': folds}, cache_path)
+    return folds
+
+def ampliar_modelo(X, y, filas, presupuesto=None, directorio='.'):
+    """Añade árboles con warm_start al modelo publicado en proporción a las filas nuevas.
+
+    `directorio` contiene los codificadores del entrenamiento en curso. Devuelve None si
+    no hay un modelo anterior compatible, si el histórico se reescribió o si el modelo
+    ya alcanzó MAX_ESTIMADORES, en cuyo caso hay que reentrenar desde cero.
+    """
+    manifiesto = leer_manifiesto(MANIFIESTO)
+    model_path = os.path.join(directorio_modelo(manifiesto), ARTEFACTOS['model'])
+    if not manifiesto or not os.path.exists(model_path):
+        logging.info("No hay un modelo anterior para ampliar, se entrena desde cero.")
+        return None
+    if manifiesto.get('clases') != clases_codificadores(directorio):
+        logging.info("La codificación cambió desde el último entrenamiento, se entrena desde cero.")
+        return None
+    model = joblib.load(model_path)
+    previas = manifiesto.get('filas', 0)
+    nuevas = filas - previas
+    if nuevas < 0 or previas <= 0:
+        logging.info("El histórico no es una ampliación del anterior, se entrena desde cero.")
+        return None
+    if nuevas == 0:
+        logging.info("No hay filas nuevas, se conserva el modelo anterior.")
+        return model
+    objetivo = model.n_estimators + max(math.ceil(model.n_estimators * nuevas / previas), PASO_ESTIMADORES)
+    if objetivo > MAX_ESTIMADORES:
+        logging.info(f"El modelo llegaría a {objetivo} árboles, se entrena desde cero.")
+        return None
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    logging.info(f"Ampliando el modelo de {model.n_estimators} a {objetivo} árboles por {nuevas} filas nuevas")
+    inicio = time.monotonic()
+    model.set_params(warm_start=True)
+    while model.n_estimators < objetivo:
+        model.set_params(n_estimators=min(model.n_estimators + PASO_ESTIMADORES, objetivo))
+        model.fit(X, y)
+        if presupuesto and time.monotonic() - inicio > presupuesto:
+            logging.warning(f"Presupuesto agotado con {model.n_estimators} árboles")
+            break
+    model.set_params(warm_start=False)
+    return model
 
-    # Definir el modelo base
-    model = RandomForestClassifier(random_state=42)
+def buscar_halving(X, y, cv, presupuesto=None):
+    """Búsqueda de hiperparámetros por reducción sucesiva, usando n_estimators como recurso.
 
-    # Realizar validación cruzada
-    scores = cross_val_score(model, X, y, cv=5)
-    logging.info(f'Precisión promedio (validación cruzada): {scores.mean():.2f} (+/- {scores.std() * 2:.2f})')
+    Con `presupuesto` se estima el coste de la búsqueda a partir de un ajuste de prueba y,
+    si no cabe, se ajusta directamente con los últimos parámetros conocidos.
+    """
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingGridSearchCV
+
+    inicio = time.monotonic()
+    if presupuesto:
+        RandomForestClassifier(n_estimators=50, random_state=42, n_jobs=-1).fit(X, y)
+        unidad = time.monotonic() - inicio
+        # 9 candidatos con 50 árboles, 5 con 100 y 3 con 200: 31 ajustes de 50 árboles por fold
+        estimado = 31 * cv.get_n_splits() * unidad * 0.8
+        restante = presupuesto - (time.monotonic() - inicio)
+        if estimado > restante:
+            manifiesto = leer_manifiesto(MANIFIESTO) or {}
+            parametros = dict(PARAMETROS_DEFECTO, **manifiesto.get('parametros', {}))
+            parametros['n_estimators'] = max(min(parametros['n_estimators'], int(50 * restante / unidad)), PASO_ESTIMADORES)
+            logging.warning(f"La búsqueda necesitaría ~{estimado:.0f}s de {restante:.0f}s disponibles, "
+                            f"se usan los parámetros {parametros}")
+            return RandomForestClassifier(random_state=42, n_jobs=-1, **parametros).fit(X, y)
 
-    # Optimizar hiperparámetros con GridSearchCV
     param_grid = {
-        'n_estimators': [50, 100, 200],
         'max_depth': [None, 10, 20],
         'min_samples_split': [2, 5, 10]
     }
-    grid_search = GridSearchCV(RandomForestClassifier(random_state=42), param_grid, cv=5, n_jobs=-1)
-    grid_search.fit(X_train, y_train)
-    logging.info(f'Mejores parámetros: {grid_search.best_params_}')
+    search = HalvingGridSearchCV(RandomForestClassifier(random_state=42), param_grid, cv=cv, factor=2,
+                                 resource='n_estimators', min_resources=50, max_resources=200,
+                                 random_state=42, n_jobs=-1)
+    search.fit(X, y)
+    logging.info(f'Precisión (validación cruzada): {search.best_score_:.2f}')
+    logging.info(f'Mejores parámetros: {search.best_params_} en {time.monotonic() - inicio:.1f}s')
+    return search.best_estimator_
+
+def train_model(df, le_result, modo='completo', presupuesto=None, directorio='.'):
+    """Entrena un modelo Random Forest con validación cruzada y optimización de hiperparámetros.
+
+    modo='completo' hace la búsqueda exhaustiva; 'halving' usa reducción sucesiva sobre folds
+    cacheados; 'incremental' amplía el modelo anterior si solo se agregaron filas y, si no,
+    recurre a 'halving'. `presupuesto` limita en segundos la búsqueda y la ampliación.
+    """
+    X = df[COLUMNAS_MODELO]
+    y = df['result']
 
-    # Obtener el mejor modelo
-    model = grid_search.best_estimator_
+    if modo == 'completo':
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+        # Definir el modelo base
+        model = RandomForestClassifier(random_state=42)
+
+        # Realizar validación cruzada
+        scores = cross_val_score(model, X, y, cv=5)
+        logging.info(f'Precisión promedio (validación cruzada): {scores.mean():.2f} (+/- {scores.std() * 2:.2f})')
+
+        # Optimizar hiperparámetros con GridSearchCV
+        param_grid = {
+            'n_estimators': [50, 100, 200],
+            'max_depth': [None, 10, 20],
+            'min_samples_split': [2, 5, 10]
+        }
+        grid_search = GridSearchCV(RandomForestClassifier(random_state=42), param_grid, cv=5, n_jobs=-1)
+        grid_search.fit(X_train, y_train)
+        logging.info(f'Mejores parámetros: {grid_search.best_params_}')
+
+        # Obtener el mejor modelo
+        model = grid_search.best_estimator_
+    else:
+        # El fold 0 queda como conjunto de prueba fijo y los otros cuatro se usan para la búsqueda
+        folds = asignar_folds(y.to_numpy())
+        prueba = folds == 0
+        X_train, X_test, y_train, y_test = X[~prueba], X[prueba], y[~prueba], y[prueba]
+        model = None
+        if modo == 'incremental':
+            model = ampliar_modelo(X_train, y_train, len(df), presupuesto, directorio)
+        if model is None:
+            model = buscar_halving(X_train, y_train, PredefinedSplit(folds[~prueba] - 1), presupuesto)
 
     # Evaluar el modelo en el conjunto de prueba
     y_pred = model.predict(X_test)
     logging.info(f'Reporte de clasificación:\n{classification_report(y_test, y_pred, target_names=le_result.classes_)}')
 
     # Guardar el modelo
-    joblib.dump(model, 'digit_classifier.pkl')
+    guardar_artefacto(model, os.path.join(directorio, ARTEFACTOS['model']))
 
     return model, le_result
 
 def main():
+    parser = argparse.ArgumentParser(description="Entrena el modelo de predicción a partir del histórico.")
+    parser.add_argument('--modo', choices=MODOS_ENTRENAMIENTO, default='completo')
+    parser.add_argument('--presupuesto', type=float, default=None, help="Segundos máximos de búsqueda/ampliación")
+    args = parser.parse_args()
+
     logging.info("Iniciando entrenamiento del modelo...")
-    df = parse_historico()
+    df = cargar_datos()
     if df.empty:
-        logging.error("No se encontraron datos válidos en historico_operaciones.txt")
+        logging.error("No se encontraron datos válidos en historico_operaciones.txt ni en historico_operaciones.db")
         return
 
     logging.info(f"Datos cargados: {len(df)} operaciones")
-    df, le_result = preprocess_data(df)
-    model, le_result = train_model(df, le_result)
-    logging.info("Modelo entrenado y guardado como 'digit_classifier.pkl'")
+    previo = leer_manifiesto(MANIFIESTO)
+    if args.modo == 'incremental' and previo and previo.get('filas') == len(df):
+        logging.info(f"No hay filas nuevas, se conserva la versión {previo['version']} del modelo.")
+        return
+
+    version = nueva_version()
+    staging = os.path.join(DIRECTORIO_VERSIONES, f'{version}.tmp')
+    os.makedirs(staging)
+    try:
+        df, le_result = preprocess_data(df, staging)
+        model, le_result = train_model(df, le_result, args.modo, args.presupuesto, staging)
+        parametros = {k: model.get_params()[k] for k in PARAMETROS_DEFECTO}
+        manifiesto = publicar_version(staging, version, len(df), modo=args.modo, parametros=parametros,
+                                      clases=clases_codificadores(staging))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    logging.info(f"Modelo entrenado y publicado en {manifiesto['directorio']} (versión {version})")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,169 @@
+import atexit
+import datetime
+import logging
+import queue
+import sqlite3
+import threading
+
+COLUMNS = [
+    'timestamp', 'asset', 'action', 'result', 'profit',
+    'digit1', 'color1', 'digit2', 'color2', 'digit3', 'color3', 'digit4', 'color4',
+    'decision', 'pred_result', 'pred_prob',
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS operaciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    asset TEXT NOT NULL,
+    action TEXT,
+    result TEXT NOT NULL,
+    profit REAL NOT NULL,
+    digit1 INTEGER, color1 TEXT,
+    digit2 INTEGER, color2 TEXT,
+    digit3 INTEGER, color3 TEXT,
+    digit4 INTEGER, color4 TEXT,
+    decision TEXT,
+    pred_result TEXT,
+    pred_prob REAL
+)
+"""
+
+
+def crear_fila(asset, action, resultado, lucro, digits_info, decision, pred_result=None, pred_prob=None):
+    fila = {
+        'timestamp': str(datetime.datetime.now()), 'asset': asset, 'action': action,
+        'result': resultado, 'profit': float(lucro), 'decision': decision,
+        'pred_result': None if pred_result is None else str(pred_result),
+        'pred_prob': None if pred_prob is None else float(pred_prob),
+    }
+    for i in range(4):
+        info = digits_info[i] if i < len(digits_info) else {}
+        fila[f'digit{i+1}'] = info.get('digit')
+        fila[f'color{i+1}'] = info.get('color')
+    return fila
+
+
+class BufferedJournal:
+    """Escritura diferida en un hilo de fondo para diarios y grabaciones.
+
+    registrar() solo encola la fila; el hilo escritor agrupa las pendientes y las
+    persiste por lotes, de modo que el hilo de trading nunca espera al disco.
+    """
+
+    def __init__(self, flush_interval=1.0, batch_size=256):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def registrar(self, fila):
+        self.queue.put(fila)
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+
+    def _abrir(self):
+        pass
+
+    def _escribir(self, filas):
+        raise NotImplementedError
+
+    def _cerrar(self):
+        pass
+
+    def _run(self):
+        self._abrir()
+        activo = True
+        while activo:
+            try:
+                filas = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(filas) < self.batch_size:
+                try:
+                    filas.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in filas:
+                activo = False
+            validas = [f for f in filas if f is not None]
+            try:
+                if validas:
+                    self._escribir(validas)
+            except Exception as e:
+                logging.error(f"Error al escribir el diario de operaciones: {e}")
+            finally:
+                for _ in filas:
+                    self.queue.task_done()
+        self._cerrar()
+
+
+class TradeJournal(BufferedJournal):
+    """Diario en SQLite (modo WAL) con una columna tipada por campo."""
+
+    def __init__(self, path='historico_operaciones.db', **kwargs):
+        self.path = path
+        self.conn = None
+        super().__init__(**kwargs)
+
+    def _abrir(self):
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def _escribir(self, filas):
+        placeholders = ', '.join(f':{c}' for c in COLUMNS)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO operaciones ({', '.join(COLUMNS)}) VALUES ({placeholders})", filas)
+
+    def _cerrar(self):
+        self.conn.close()
+
+
+class TextJournal(BufferedJournal):
+    """Diario en el formato de texto histórico de historico_operaciones.txt."""
+
+    def __init__(self, path='historico_operaciones.txt', **kwargs):
+        self.path = path
+        super().__init__(**kwargs)
+
+    def _escribir(self, filas):
+        with open(self.path, 'a') as archivo:
+            archivo.writelines(formatear_linea(f) for f in filas)
+
+
+def formatear_linea(fila):
+    digits_str = '; '.join(
+        f"Tick {i+1}: Dígito={fila[f'digit{i+1}']} ({fila[f'color{i+1}']})"
+        for i in range(4) if fila[f'digit{i+1}'] is not None)
+    pred_str = f" | Predicción IA: {fila['pred_result']} ({fila['pred_prob']:.2f})" if fila['pred_result'] and fila['pred_prob'] else ""
+    return (
+        f"{fila['timestamp']} | Activo: {fila['asset']} | Dirección: {fila['action']} | "
+        f"Resultado: {fila['result']} | Lucro/Pérdida: {fila['profit']} | "
+        f"Análisis: [{digits_str}] | Decisión: {fila['decision']}{pred_str}\n"
+    )
+
+
+def leer_operaciones(path='historico_operaciones.db', resultados=('WIN', 'LOSS', 'EMPATE')):
+    """Carga las operaciones del diario SQLite como DataFrame, filtradas por resultado."""
+    import pandas as pd
+
+    conn = sqlite3.connect(path)
+    try:
+        marcadores = ', '.join('?' for _ in resultados)
+        return pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNS)} FROM operaciones WHERE result IN ({marcadores}) AND digit4 IS NOT NULL",
+            conn, params=list(resultados))
+    finally:
+        conn.close()
@@ -0,0 +1,192 @@
+import bisect
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+           0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = list(zip(nombres, valores)) + ([extra] if extra else [])
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pares) + '}'
+
+
+class _Metric:
+    tipo = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(l, '')) for l in self.labels)
+
+    def render(self):
+        lineas = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.tipo}']
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lineas.append(f'{self.name}{_etiquetas(self.labels, key)} {value}')
+        return lineas
+
+    def snapshot(self):
+        with self._lock:
+            return {','.join(key) or '_': value for key, value in self.values.items()}
+
+
+class Counter(_Metric):
+    tipo = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Suma de las series cuyas etiquetas coinciden con las indicadas."""
+        with self._lock:
+            return sum(v for key, v in self.values.items()
+                       if all(key[self.labels.index(k)] == str(val) for k, val in labels.items()))
+
+
+class Gauge(Counter):
+    tipo = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Histograma de buckets fijos; observe() es una búsqueda binaria y un incremento."""
+
+    tipo = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            serie = self.values.get(key)
+            if serie is None:
+                serie = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][i] += 1
+            serie[1] += value
+            serie[2] += 1
+
+    def render(self):
+        lineas = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, n) in sorted(self.values.items()):
+                acumulado = 0
+                for limite, c in zip(self.buckets + ('+Inf',), counts):
+                    acumulado += c
+                    lineas.append(f'{self.name}_bucket{_etiquetas(self.labels, key, ("le", limite))} {acumulado}')
+                lineas.append(f'{self.name}_sum{_etiquetas(self.labels, key)} {total}')
+                lineas.append(f'{self.name}_count{_etiquetas(self.labels, key)} {n}')
+        return lineas
+
+    def snapshot(self):
+        with self._lock:
+            return {','.join(key) or '_': {'count': n, 'sum': total, 'buckets': dict(zip(map(str, self.buckets + ('+Inf',)), counts))}
+                    for key, (counts, total, n) in self.values.items()}
+
+
+class Metrics:
+    """Registro de métricas del bot con exportación en formato de texto de Prometheus."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._stop = threading.Event()
+
+    def _registrar(self, cls, name, help, labels, **kwargs):
+        with self._lock:
+            if name not in self.metrics:
+                self.metrics[name] = cls(name, help, labels, **kwargs)
+            return self.metrics[name]
+
+    def counter(self, name, help, labels=()):
+        return self._registrar(Counter, name, help, labels)
+
+    def gauge(self, name, help, labels=()):
+        return self._registrar(Gauge, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=BUCKETS):
+        return self._registrar(Histogram, name, help, labels, buckets=buckets)
+
+    @contextlib.contextmanager
+    def span(self, stage, **labels):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - inicio, stage=stage, **labels)
+
+    def render(self):
+        lineas = []
+        for metric in list(self.metrics.values()):
+            lineas.extend(metric.render())
+        return '\n'.join(lineas) + '\n'
+
+    def snapshot(self):
+        return {'timestamp': time.time(), **{name: m.snapshot() for name, m in list(self.metrics.items())}}
+
+    def serve(self, port, host='127.0.0.1'):
+        registro = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registro.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metricas-http", daemon=True).start()
+        logging.info(f"Métricas disponibles en http://{host}:{port}/metrics")
+
+    def write_snapshots(self, path, interval=10.0):
+        def escribir():
+            while not self._stop.wait(interval):
+                try:
+                    with open(f'{path}.tmp', 'w') as archivo:
+                        json.dump(self.snapshot(), archivo)
+                    os.replace(f'{path}.tmp', path)
+                except Exception as e:
+                    logging.error(f"Error al escribir el snapshot de métricas: {e}")
+        threading.Thread(target=escribir, name="metricas-snapshot", daemon=True).start()
+
+    def close(self):
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+
+
+metrics = Metrics()
+
+STAGE_SECONDS = metrics.histogram('bot_stage_seconds', 'Duración de cada etapa del ciclo de trading', ('stage', 'asset'))
+TICK_TO_ORDER_SECONDS = metrics.histogram('bot_tick_to_order_seconds', 'Tiempo desde el último tick hasta que api.buy devuelve', ('asset',))
+ORDER_TO_SETTLEMENT_SECONDS = metrics.histogram('bot_order_to_settlement_seconds', 'Tiempo desde la orden hasta su liquidación', ('asset',))
+DEADLINE_MISSES = metrics.counter('bot_deadline_misses_total', 'Órdenes enviadas después del plazo de decisión', ('asset',))
+TICKS = metrics.counter('bot_ticks_total', 'Ticks procesados', ('asset',))
+TRADES = metrics.counter('bot_trades_total', 'Operaciones liquidadas por resultado', ('asset', 'result'))
+PROFIT = metrics.gauge('bot_profit_total', 'Lucro acumulado de las operaciones liquidadas', ('asset',))
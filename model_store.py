@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+ARTEFACTOS = {
+    'model': 'digit_classifier.pkl',
+    'le_color': 'le_color.pkl',
+    'le_decision': 'le_decision.pkl',
+    'le_result': 'le_result.pkl',
+}
+MANIFIESTO = 'modelo_version.json'
+DIRECTORIO_VERSIONES = 'modelos'
+
+
+def hash_archivo(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1 << 20), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def leer_manifiesto(path):
+    """Contenido del manifiesto que ia.py escribe al terminar un entrenamiento, o None."""
+    try:
+        with open(path) as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Manifiesto del modelo no válido: {e}")
+        return None
+
+
+class Modelo:
+    """Modelo entrenado junto con sus codificadores y la tabla de predicción precalculada."""
+
+    def __init__(self, model, le_color, le_decision, le_result, tabla=None, version=None):
+        self.model = model
+        self.le_color = le_color
+        self.le_decision = le_decision
+        self.le_result = le_result
+        self.tabla = tabla
+        self.version = version
+
+    def validar(self):
+        """Comprueba que modelo, codificadores y tabla son coherentes antes de ponerlo en servicio."""
+        if 'WIN' not in self.le_result.classes_:
+            raise ValueError("el codificador de resultados no contiene WIN")
+        if getattr(self.model, 'n_features_in_', 9) != 9:
+            raise ValueError(f"el modelo espera {self.model.n_features_in_} variables en lugar de 9")
+        if list(self.model.classes_) != list(range(len(self.le_result.classes_))):
+            raise ValueError("las clases del modelo no corresponden al codificador de resultados")
+        colores = list(self.le_color.classes_)
+        digits_info = [{'digit': d, 'color': colores[d % len(colores)]} for d in (7, 2, 9, 4)]
+        for decision in self.le_decision.classes_:
+            esperado = self.predecir(digits_info, decision, usar_tabla=False)
+            if esperado[0] is None:
+                raise ValueError(f"el modelo no puede predecir la decisión {decision}")
+            if self.tabla is not None:
+                obtenido = self.tabla.predecir(digits_info, decision)
+                if obtenido[0] != esperado[0] or abs(obtenido[1] - esperado[1]) > 1e-4:
+                    raise ValueError("la tabla de predicción no coincide con el modelo")
+
+    def predecir(self, digits_info, decision, usar_tabla=True):
+        if usar_tabla and self.tabla is not None:
+            return self.tabla.predecir(digits_info, decision)
+
+        import pandas as pd
+
+        try:
+            data = {
+                'digit1': digits_info[0]['digit'], 'color1': self.le_color.transform([digits_info[0]['color']])[0],
+                'digit2': digits_info[1]['digit'], 'color2': self.le_color.transform([digits_info[1]['color']])[0],
+                'digit3': digits_info[2]['digit'], 'color3': self.le_color.transform([digits_info[2]['color']])[0],
+                'digit4': digits_info[3]['digit'], 'color4': self.le_color.transform([digits_info[3]['color']])[0],
+                'decision': self.le_decision.transform([decision])[0]
+            }
+            df = pd.DataFrame([data])
+
+            pred = self.model.predict(df)[0]
+            pred_proba = self.model.predict_proba(df)[0]
+            pred_result = self.le_result.inverse_transform([pred])[0]
+            win_prob = pred_proba[self.le_result.transform(['WIN'])[0]]
+
+            return pred_result, win_prob
+        except Exception as e:
+            logging.error(f"Error en la predicción: {e}")
+            return None, None
+
+
+class ModelStore:
+    """Carga diferida y recarga en caliente de los artefactos de la IA.
+
+    joblib, sklearn y pandas solo se importan al cargar el modelo, y la carga puede
+    hacerse en un hilo de fondo mientras se establecen la conexión y el stream.
+    vigilar() sondea el manifiesto que ia.py escribe al terminar cada entrenamiento;
+    cada versión vive en su propio directorio y el manifiesto guarda el hash de sus
+    artefactos. Una versión nueva se carga, se comprueba y se valida en segundo plano
+    y queda pendiente hasta que el bot llama a promover() entre ciclos. Si la carga o
+    la validación fallan se sigue usando el modelo anterior. Sin manifiesto se leen
+    los artefactos sueltos del directorio, como antes de versionar.
+    """
+
+    def __init__(self, directory='.', usar_tabla=True):
+        self.directory = directory
+        self.usar_tabla = usar_tabla
+        self.actual = None
+        self.pendiente = None
+        self.version_fallida = None
+        self._listo = threading.Event()
+        self._thread = None
+        self._watcher = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._carga_lock = threading.Lock()
+
+    def rutas(self, manifiesto=None):
+        directorio = os.path.join(self.directory, (manifiesto or {}).get('directorio', ''))
+        return {clave: os.path.join(directorio, nombre) for clave, nombre in ARTEFACTOS.items()}
+
+    def manifiesto(self):
+        return leer_manifiesto(os.path.join(self.directory, MANIFIESTO))
+
+    def _version(self):
+        manifiesto = self.manifiesto()
+        return manifiesto.get('version') if manifiesto else None
+
+    def _leer(self, manifiesto):
+        import joblib
+        from prediction_table import PredictionTable
+
+        rutas = self.rutas(manifiesto)
+        hashes = (manifiesto or {}).get('sha256', {})
+        for clave, ruta in rutas.items():
+            esperado = hashes.get(ARTEFACTOS[clave])
+            if esperado and hash_archivo(ruta) != esperado:
+                raise ValueError(f"{ruta} no coincide con el hash del manifiesto")
+        artefactos = {clave: joblib.load(ruta) for clave, ruta in rutas.items()}
+        modelo = Modelo(version=(manifiesto or {}).get('version'), **artefactos)
+        if self.usar_tabla:
+            modelo.tabla = PredictionTable(modelo.model, modelo.le_color, modelo.le_decision, modelo.le_result)
+        modelo.validar()
+        return modelo
+
+    def cargar(self):
+        """Carga inicial: el modelo queda en servicio en cuanto se valida."""
+        with self._carga_lock:
+            try:
+                self.actual = self._leer(self.manifiesto())
+                logging.info("Modelo y codificadores cargados correctamente.")
+            except FileNotFoundError:
+                logging.warning("Modelo o codificadores no encontrados. La IA no estará activa.")
+            except Exception as e:
+                logging.error(f"Error al cargar el modelo: {e}")
+            finally:
+                self._listo.set()
+        return self.actual
+
+    def recargar(self):
+        """Carga la versión del manifiesto si es nueva; devuelve True si queda pendiente de promover."""
+        with self._carga_lock:
+            manifiesto = self.manifiesto()
+            version = manifiesto.get('version') if manifiesto else None
+            vigente = self.pendiente or self.actual
+            if version is None or version == self.version_fallida or (vigente and vigente.version == version):
+                return False
+            logging.info(f"Nueva versión del modelo detectada ({version}), cargando en segundo plano...")
+            try:
+                modelo = self._leer(manifiesto)
+            except Exception as e:
+                self.version_fallida = version
+                logging.error(f"La versión {version} del modelo no es válida, se mantiene la anterior: {e}")
+                return False
+            if self._version() != version:
+                logging.warning("El modelo cambió durante la carga, se reintentará.")
+                return False
+            with self._lock:
+                self.pendiente = modelo
+            return True
+
+    def promover(self):
+        """Pone en servicio el modelo pendiente; el bot lo llama entre ciclos."""
+        with self._lock:
+            if self.pendiente is None:
+                return False
+            self.actual, self.pendiente = self.pendiente, None
+        logging.info(f"Modelo actualizado a la versión {self.actual.version}.")
+        return True
+
+    def cargar_en_segundo_plano(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.cargar, name="carga-modelo", daemon=True)
+                self._thread.start()
+
+    def vigilar(self, intervalo=30.0):
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._vigilar, args=(intervalo,), name="vigilancia-modelo",
+                                             daemon=True)
+            self._watcher.start()
+
+    def _vigilar(self, intervalo):
+        self._listo.wait()
+        while not self._stop.wait(intervalo):
+            try:
+                self.recargar()
+            except Exception as e:
+                logging.error(f"Error al vigilar el modelo: {e}")
+
+    def detener(self):
+        self._stop.set()
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+        if watcher:
+            watcher.join(timeout=1)
+
+    @property
+    def cargando(self):
+        return self._thread is not None and not self._listo.is_set()
+
+    def obtener(self, timeout=0):
+        """Modelo en servicio, o None si no existe o aún no terminó de cargarse en `timeout` segundos."""
+        if self._thread is None and not self._listo.is_set():
+            self.cargar_en_segundo_plano()
+        self._listo.wait(timeout)
+        return self.actual
@@ -0,0 +1,137 @@
+import itertools
+import logging
+import threading
+import time
+
+
+class _Orden:
+    def __init__(self, amount, asset, action, expiration):
+        self.amount = amount
+        self.asset = asset
+        self.action = action
+        self.expiration = expiration
+        self.request_id = None
+        self.resultado = (False, None)
+        self.lista = threading.Event()
+
+
+class OrderDispatcher:
+    """Agrupa las órdenes de todos los activos de una vela y las envía juntas.
+
+    iqoptionapi.buy espera la respuesta del servidor antes de volver, así que con un
+    lock por orden las del segundo 59 se encolaban una tras otra. El despachador
+    espera `ventana` segundos desde la primera orden (o a que lleguen `esperadas`),
+    envía cada orden del lote con buyv3 y un request_id propio y empareja las
+    respuestas por ese request_id. No se usa buy_multi: devuelve los IDs ordenando
+    las claves como texto ('0', '1', '10', '11', ..., '2'), con más de 10 órdenes
+    asigna IDs al activo equivocado, y espera sin límite con el lock tomado.
+    Las respuestas que no llegan en `timeout` segundos se dan por fallidas, se libera
+    el lock y, si llegan más tarde, se avisa de que esa orden no se seguirá. Si la API
+    no expone buyv3 se recurre a buy orden por orden.
+    """
+
+    def __init__(self, api, lock=None, ventana=0.05, esperadas=None, timeout=10.0):
+        self.api = api
+        self.lock = lock or threading.Lock()
+        self.ventana = ventana
+        self.esperadas = esperadas
+        self.timeout = timeout
+        self.pendientes = []
+        self.sin_respuesta = {}
+        self._request_ids = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ordenes", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2 * self.timeout)
+            self._thread = None
+
+    def buy(self, amount, asset, action, expiration):
+        """Mismo contrato que api.buy: devuelve (check, order_id)."""
+        self.start()
+        orden = _Orden(amount, asset, action, expiration)
+        with self._cond:
+            self.pendientes.append(orden)
+            self._cond.notify_all()
+        # El despachador resuelve cada orden como mucho en timeout (lock) + timeout (respuestas)
+        if not orden.lista.wait(self.ventana + 2 * self.timeout + 1):
+            logging.error(f"El despachador no respondió a la orden de {asset}.")
+        return orden.resultado
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                self._cond.wait_for(lambda: self.pendientes or self._stop.is_set())
+                limite = time.monotonic() + self.ventana
+                while (not self._stop.is_set() and (self.esperadas is None or len(self.pendientes) < self.esperadas)
+                       and time.monotonic() < limite):
+                    self._cond.wait(limite - time.monotonic())
+                lote, self.pendientes = self.pendientes, []
+            if lote:
+                self._enviar(lote)
+
+    def _enviar(self, lote):
+        if not self.lock.acquire(timeout=self.timeout):
+            logging.error(f"API ocupada, se descartan {len(lote)} órdenes.")
+            for orden in lote:
+                orden.lista.set()
+            return
+        try:
+            ws = getattr(self.api, 'api', None)
+            if hasattr(ws, 'buyv3'):
+                self._enviar_v3(ws, lote)
+            else:
+                for orden in lote:
+                    orden.resultado = self.api.buy(orden.amount, orden.asset, orden.action, orden.expiration)
+            logging.info(f"Lote de {len(lote)} órdenes enviado.")
+        except Exception as e:
+            logging.error(f"Error al enviar el lote de órdenes: {e}")
+        finally:
+            self.lock.release()
+            for orden in lote:
+                orden.lista.set()
+
+    def _enviar_v3(self, ws, lote):
+        self._respuestas_tardias(ws)
+        opcodes = self.api.get_all_ACTIVES_OPCODE()
+        for orden in lote:
+            orden.request_id = f"lote{next(self._request_ids)}"
+            ws.buyv3(float(orden.amount), opcodes[orden.asset], str(orden.action), int(orden.expiration),
+                     orden.request_id)
+        limite = time.monotonic() + self.timeout
+        esperando = list(lote)
+        while esperando and time.monotonic() < limite:
+            for orden in list(esperando):
+                respuesta = ws.buy_multi_option.pop(orden.request_id, None)
+                if respuesta is not None:
+                    order_id = respuesta.get('id')
+                    orden.resultado = (order_id is not None, order_id)
+                    esperando.remove(orden)
+            if esperando:
+                time.sleep(0.005)
+        for orden in esperando:
+            logging.error(f"Sin respuesta del servidor para la orden de {orden.asset} en {self.timeout}s.")
+            self.sin_respuesta[orden.request_id] = (ws, orden)
+
+    def _respuestas_tardias(self, ws):
+        """Avisa de las órdenes dadas por fallidas cuya confirmación llegó después del plazo."""
+        for request_id, (origen, orden) in list(self.sin_respuesta.items()):
+            # Tras reconectar, las respuestas de la sesión anterior ya no llegarán
+            respuesta = ws.buy_multi_option.pop(request_id, None) if origen is ws else {}
+            if respuesta is not None:
+                del self.sin_respuesta[request_id]
+                if respuesta.get('id') is not None:
+                    logging.error(f"La orden {orden.action} de {orden.asset} se abrió tarde con ID "
+                                  f"{respuesta['id']} y no se liquidará en el bot.")
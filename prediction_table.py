@@ -0,0 +1,71 @@
+import logging
+
+import numpy as np
+
+FEATURES = ['digit1', 'color1', 'digit2', 'color2', 'digit3', 'color3', 'digit4', 'color4', 'decision']
+
+
+class PredictionTable:
+    """Tabla precalculada con la salida del modelo para todo el espacio de entradas.
+
+    El espacio de características es finito (4 dígitos 0-9, 4 colores y la decisión),
+    así que se evalúa una sola vez al cargar el modelo y cada predicción posterior es
+    un acceso O(1) a un array de NumPy, sin pandas ni sklearn.
+    """
+
+    def __init__(self, model, le_color, le_decision, le_result, batch_size=100000):
+        import pandas as pd
+
+        self.colors = {c: i for i, c in enumerate(le_color.classes_)}
+        self.decisions = {d: i for i, d in enumerate(le_decision.classes_)}
+        self.results = np.asarray(le_result.classes_)
+        n_colors = len(self.colors)
+        shape = (10, n_colors) * 4 + (len(self.decisions),)
+
+        win_code = le_result.transform(['WIN'])[0]
+        win_col = list(model.classes_).index(win_code)
+        codes = np.indices(shape).reshape(len(shape), -1).T
+        win_prob = np.empty(len(codes), dtype=np.float32)
+        pred = np.empty(len(codes), dtype=np.uint8)
+        for start in range(0, len(codes), batch_size):
+            chunk = pd.DataFrame(codes[start:start + batch_size], columns=FEATURES)
+            proba = model.predict_proba(chunk)
+            win_prob[start:start + batch_size] = proba[:, win_col]
+            pred[start:start + batch_size] = model.classes_[proba.argmax(axis=1)]
+        self.win_prob = win_prob.reshape(shape)
+        self.pred = pred.reshape(shape)
+        logging.info(f"Tabla de predicción generada: {len(codes)} combinaciones ({self.win_prob.nbytes + self.pred.nbytes} bytes).")
+
+    @classmethod
+    def desde_arrays(cls, pred, win_prob, results, colors, decisions):
+        """Reconstruye la tabla sin el modelo, p. ej. con los arrays que sweep.py comparte entre procesos."""
+        tabla = cls.__new__(cls)
+        tabla.pred = pred
+        tabla.win_prob = win_prob
+        tabla.results = np.asarray(results)
+        tabla.colors = dict(colors)
+        tabla.decisions = dict(decisions)
+        return tabla
+
+    def predecir(self, digits_info, decision):
+        try:
+            idx = []
+            for info in digits_info[:4]:
+                idx.append(info['digit'])
+                idx.append(self.colors[info['color']])
+            idx.append(self.decisions[decision])
+        except KeyError:
+            return None, None
+        idx = tuple(idx)
+        try:
+            return self.results[self.pred[idx]], float(self.win_prob[idx])
+        except (IndexError, TypeError):
+            return None, None
+
+    def predecir_lote(self, digits, colors, decisions):
+        """Versión vectorizada: digits y colors (N, 4) con índices de color, decisions (N,)."""
+        digits = np.asarray(digits)
+        colors = np.asarray(colors)
+        idx = (digits[:, 0], colors[:, 0], digits[:, 1], colors[:, 1],
+               digits[:, 2], colors[:, 2], digits[:, 3], colors[:, 3], np.asarray(decisions))
+        return self.results[self.pred[idx]], self.win_prob[idx]
@@ -0,0 +1,52 @@
+import collections
+import math
+import threading
+import time
+
+
+class CandleScheduler:
+    """Planificador del ciclo de velas alineado con la hora del servidor.
+
+    Mantiene el desfase entre el reloj monotónico local y los timestamps del servidor
+    que llegan con cada tick. La latencia de red solo puede hacer que un tick parezca
+    más antiguo, así que se usa el máximo de las últimas muestras como estimación.
+    Los eventos se fijan en hora del servidor y se esperan con time.monotonic(), por
+    lo que no les afectan los saltos del reloj de pared local.
+    """
+
+    def __init__(self, candle_duration=60, samples=50):
+        self.candle_duration = candle_duration
+        self.samples = collections.deque(maxlen=samples)
+        self.offset = time.time() - time.monotonic()
+        self._lock = threading.Lock()
+
+    def sync(self, server_timestamp, received=None):
+        if not server_timestamp:
+            return
+        received = time.monotonic() if received is None else received
+        with self._lock:
+            self.samples.append(server_timestamp - received)
+            self.offset = max(self.samples)
+
+    def server_now(self):
+        return time.monotonic() + self.offset
+
+    def to_monotonic(self, server_time):
+        return server_time - self.offset
+
+    def proximo(self, segundo):
+        """Hora del servidor de la próxima vez que la vela en curso alcanza `segundo`."""
+        ahora = self.server_now()
+        objetivo = math.floor(ahora / self.candle_duration) * self.candle_duration + segundo
+        if objetivo <= ahora:
+            objetivo += self.candle_duration
+        return objetivo
+
+    def esperar(self, server_time, stop_event, paso=0.5):
+        """Espera hasta `server_time`; devuelve False si stop_event se activa antes."""
+        while not stop_event.is_set():
+            restante = self.to_monotonic(server_time) - time.monotonic()
+            if restante <= 0:
+                return True
+            stop_event.wait(min(restante, paso))
+        return False
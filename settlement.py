@@ -0,0 +1,97 @@
+import logging
+import queue
+import threading
+import time
+
+
+class SettlementTracker:
+    """Liquida en segundo plano las órdenes abiertas.
+
+    Las órdenes se encolan con un callback que recibe el resultado en cuanto la
+    opción se cierra; el hilo de la estrategia no espera a la liquidación.
+    check_win_v4 de iqoptionapi no vuelve hasta que la opción se cierra (espera
+    activa sobre api.socket_option_closed), así que los workers consultan ese
+    diccionario sin bloquear, duermen entre consultas y solo llaman a check_win_v4
+    cuando el resultado ya está disponible. Las órdenes sin cierre tras `timeout`
+    segundos se abandonan.
+    """
+
+    def __init__(self, api, workers=4, poll_interval=0.1, timeout=300):
+        self.api = api
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.orders = queue.Queue()
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"liquidacion-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, order_id, callback):
+        with self._lock:
+            self.pending += 1
+        self.start()
+        self.orders.put((order_id, callback))
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                order_id, callback = self.orders.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                resultado = self._esperar_resultado(order_id)
+                if resultado is not None:
+                    callback(resultado)
+            except Exception as e:
+                logging.error(f"Error al liquidar la operación {order_id}: {e}")
+            finally:
+                with self._lock:
+                    self.pending -= 1
+                    self._idle.notify_all()
+
+    def _cerrada(self, order_id):
+        """True/False si la API expone las opciones cerradas, None si no se puede saber sin bloquear."""
+        cerradas = getattr(getattr(self.api, 'api', None), 'socket_option_closed', None)
+        if cerradas is None:
+            return None
+        return cerradas.get(order_id) is not None
+
+    def _esperar_resultado(self, order_id):
+        limite = time.monotonic() + self.timeout
+        while not self._stop.is_set():
+            if time.monotonic() > limite:
+                logging.error(f"La operación {order_id} no se cerró en {self.timeout}s, se deja de esperar.")
+                return None
+            if self._cerrada(order_id) is not False:
+                try:
+                    status, resultado = self.api.check_win_v4(order_id)
+                except Exception as e:
+                    logging.warning(f"check_win_v4 falló para {order_id}: {e}")
+                    status, resultado = None, None
+                if status:
+                    return resultado
+            self._stop.wait(self.poll_interval)
+        return None
+
+    def wait(self, timeout=None):
+        with self._lock:
+            return self._idle.wait_for(lambda: self.pending == 0, timeout)
+
+    def stop(self, timeout=None):
+        if not self.wait(timeout):
+            logging.warning(f"Se detiene la liquidación con {self.pending} operaciones abiertas.")
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
@@ -0,0 +1,291 @@
+import argparse
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+
+
+class _SimulatedWS:
+    """Estado interno equivalente a IQ_Option.api que usa el hook del stream."""
+
+    def __init__(self, iq=None):
+        self.real_time_candles = defaultdict(lambda: defaultdict(dict))
+        self.socket_option_closed = {}
+        self.buy_multi_option = {}
+        self._iq = iq
+
+    def buyv3(self, price, active, direction, duration, request_id):
+        """Envía la orden sin esperar; la respuesta llega a buy_multi_option[str(request_id)]."""
+        threading.Timer(self._iq.buy_latency, self._iq._responder,
+                        args=(self, price, active, direction, duration, request_id)).start()
+
+
+class SimulatedIQOption:
+    """Sustituto local de iqoptionapi.stable_api.IQ_Option para pruebas sin red.
+
+    Genera velas en tiempo real para cualquier número de activos, con un paseo
+    aleatorio o reproduciendo ticks grabados por TickRecorder, y liquida las órdenes
+    al vencimiento con un retardo configurable. Como la API real, connect() crea un
+    api interno nuevo (con buffers de velas y opciones cerradas vacíos), buy espera
+    la ida y vuelta al servidor, buy_multi devuelve los IDs ordenando los request_id
+    como texto y check_win_v4 no vuelve hasta que la opción se cierra. Con reply_loss
+    se pierde esa fracción de las respuestas a las órdenes.
+    """
+
+    def __init__(self, email=None, password=None, assets=None, n_assets=5, tick_rate=2.0, precision=5,
+                 payout=0.85, settle_delay=0.5, buy_latency=0.2, reply_loss=0.0, replay_dir=None, seed=None):
+        self.email = email
+        self.password = password
+        self.assets = assets or [f'SIM{i}-OTC' for i in range(n_assets)]
+        self.opcodes = {asset: 1000 + i for i, asset in enumerate(self.assets)}
+        self.tick_rate = tick_rate
+        self.precision = precision
+        self.payout = payout
+        self.settle_delay = settle_delay
+        self.buy_latency = buy_latency
+        self.reply_loss = reply_loss
+        self.replay_dir = replay_dir
+        self.random = random.Random(seed)
+        self.api = _SimulatedWS(self)
+        self.balance_type = None
+        self.connected = False
+        self.prices = {}
+        self.replays = {}
+        self.streams = set()
+        self.orders = {}
+        self.order_ids = itertools.count(1)
+        self.ticks_emitted = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def connect(self):
+        with self._lock:
+            self.api = _SimulatedWS(self)
+            self.connected = True
+            # iqoptionapi vuelve a suscribir los streams abiertos en la sesión nueva
+            for asset, size in self.streams:
+                self._emitir(asset, size, time.time())
+        return True, None
+
+    def desconectar(self):
+        """Simula la caída del websocket; check_connect devuelve False hasta el próximo connect()."""
+        self.connected = False
+
+    def check_connect(self):
+        return self.connected
+
+    def change_balance(self, balance_type):
+        self.balance_type = balance_type
+
+    def get_server_timestamp(self):
+        return time.time()
+
+    def get_all_ACTIVES_OPCODE(self):
+        return dict(self.opcodes)
+
+    def update_ACTIVES_OPCODE(self):
+        pass
+
+    def subscribe_top_assets_updated(self, instrument_type):
+        pass
+
+    def get_all_init_v2(self):
+        actives = {str(op): {'name': f'front.{a}', 'precision': self.precision} for a, op in self.opcodes.items()}
+        return {'turbo': {'actives': actives}, 'binary': {'actives': actives}}
+
+    def get_all_profit(self):
+        return {asset: {'turbo': self.payout, 'binary': self.payout} for asset in self.assets}
+
+    def _precio_inicial(self, asset):
+        if self.replay_dir:
+            from tick_recorder import TickReader
+            ticks = TickReader(self.replay_dir).rango(asset)
+            if len(ticks):
+                self.replays[asset] = itertools.cycle(ticks['price'].tolist())
+                return next(self.replays[asset])
+        return round(self.random.uniform(1, 100), self.precision)
+
+    def _siguiente_precio(self, asset):
+        if asset in self.replays:
+            return next(self.replays[asset])
+        paso = self.random.choice((-1, 1)) * self.random.randint(0, 20) / 10 ** self.precision
+        return round(max(self.prices[asset] + paso, 10 ** -self.precision), self.precision)
+
+    def start_candles_stream(self, asset, size, maxdict):
+        with self._lock:
+            if asset not in self.prices:
+                self.prices[asset] = self._precio_inicial(asset)
+            self.streams.add((asset, size))
+            self._emitir(asset, size, time.time())
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._generar, name="simulador", daemon=True)
+            self._thread.start()
+
+    def stop_candles_stream(self, asset, size):
+        with self._lock:
+            self.streams.discard((asset, size))
+
+    def get_realtime_candles(self, asset, size):
+        return self.api.real_time_candles[asset][size]
+
+    def _emitir(self, asset, size, now):
+        price = self.prices[asset]
+        inicio = int(now // size * size)
+        candles = self.api.real_time_candles[asset][size]
+        vela = candles.get(inicio)
+        candles[inicio] = {
+            'id': inicio // size, 'from': inicio, 'to': inicio + size, 'at': int(now * 1e9),
+            'open': vela['open'] if vela else price, 'close': price,
+            'min': min(vela['min'], price) if vela else price,
+            'max': max(vela['max'], price) if vela else price,
+        }
+        for viejo in [k for k in candles.keys() if k < inicio - 10 * size]:
+            del candles[viejo]
+        self.ticks_emitted += 1
+
+    def _generar(self):
+        intervalo = 1.0 / self.tick_rate
+        siguiente = time.monotonic()
+        while not self._stop.is_set():
+            now = time.time()
+            with self._lock:
+                for asset in {a for a, _ in self.streams}:
+                    self.prices[asset] = self._siguiente_precio(asset)
+                for asset, size in list(self.streams):
+                    self._emitir(asset, size, now)
+                self._liquidar(now)
+            siguiente += intervalo * self.random.uniform(0.5, 1.5)
+            self._stop.wait(max(siguiente - time.monotonic(), 0))
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def buy(self, price, ACTIVES, ACTION, expirations):
+        # Como iqoptionapi: reinicia buy_multi_option, envía con request_id "buy" y espera hasta 5 s
+        self.api.buy_multi_option = {}
+        self.api.buyv3(float(price), self.opcodes.get(ACTIVES), str(ACTION), int(expirations), "buy")
+        limite = time.time() + 5
+        while self.api.buy_multi_option.get("buy") is None:
+            if time.time() > limite:
+                return False, None
+            time.sleep(0.001)
+        order_id = self.api.buy_multi_option["buy"].get('id')
+        return order_id is not None, order_id
+
+    def buy_multi(self, price, ACTIVES, ACTION, expirations):
+        """Igual que iqoptionapi: espera sin límite todas las respuestas y las devuelve por sorted(request_id)."""
+        self.api.buy_multi_option = {}
+        for idx, orden in enumerate(zip(price, ACTIVES, ACTION, expirations)):
+            self.api.buyv3(float(orden[0]), self.opcodes.get(orden[1]), str(orden[2]), int(orden[3]), idx)
+        while len(self.api.buy_multi_option) < len(price):
+            time.sleep(0.001)
+        buy_id = []
+        for key in sorted(self.api.buy_multi_option.keys()):
+            buy_id.append(self.api.buy_multi_option[str(key)].get('id'))
+        return buy_id
+
+    def _responder(self, ws, price, active, direction, duration, request_id):
+        activos = {opcode: asset for asset, opcode in self.opcodes.items()}
+        with self._lock:
+            if ws is not self.api:
+                return
+            check, order_id = self._abrir(price, activos.get(active), direction, duration)
+            if self.random.random() < self.reply_loss:
+                return
+        ws.buy_multi_option[str(request_id)] = {'id': order_id} if check else {'message': 'orden rechazada'}
+
+    def _abrir(self, price, ACTIVES, ACTION, expirations):
+        now = time.time()
+        if not self.connected or ACTIVES not in self.prices:
+            return False, None
+        # Como en las opciones turbo, con menos de 30 s para el cierre se pasa al minuto siguiente
+        vencimiento = (math.floor(now / 60) + expirations) * 60
+        if vencimiento - now < 30:
+            vencimiento += 60
+        order_id = next(self.order_ids)
+        self.orders[order_id] = {
+            'asset': ACTIVES, 'action': ACTION, 'amount': float(price), 'entrada': self.prices[ACTIVES],
+            'creada': now, 'vencimiento': vencimiento, 'resultado': None,
+        }
+        return True, order_id
+
+    def _liquidar(self, now):
+        for order_id, order in self.orders.items():
+            if order['resultado'] is None and now >= order['vencimiento'] + self.settle_delay:
+                salida = self.prices[order['asset']]
+                movimiento = (salida - order['entrada']) * (1 if order['action'] == 'call' else -1)
+                if movimiento > 0:
+                    order['resultado'] = ('win', round(order['amount'] * self.payout, 2))
+                elif movimiento < 0:
+                    order['resultado'] = ('loose', -order['amount'])
+                else:
+                    order['resultado'] = ('equal', 0)
+                order['liquidada'] = now
+                ganado, lucro = order['resultado']
+                self.api.socket_option_closed[order_id] = {'msg': {
+                    'id': order_id, 'win': ganado, 'sum': order['amount'], 'win_amount': order['amount'] + max(lucro, 0)}}
+
+    def check_win_v4(self, id_number):
+        # Igual que iqoptionapi: espera activa hasta que llega el cierre de la opción
+        while self.api.socket_option_closed.get(id_number) is None:
+            pass
+        msg = self.api.socket_option_closed[id_number]['msg']
+        if msg['win'] == 'equal':
+            return msg['win'], 0
+        if msg['win'] == 'loose':
+            return msg['win'], float(msg['sum']) * -1
+        return msg['win'], float(msg['win_amount']) - float(msg['sum'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del bot contra el simulador local de IQ Option.")
+    parser.add_argument('--activos', type=int, default=20)
+    parser.add_argument('--tasa', type=float, default=5.0, help="Ticks por segundo y activo")
+    parser.add_argument('--duracion', type=float, default=180.0, help="Segundos de simulación")
+    parser.add_argument('--retardo', type=float, default=0.5, help="Retardo de liquidación en segundos")
+    parser.add_argument('--latencia', type=float, default=0.2, help="Ida y vuelta de buy/buy_multi en segundos")
+    parser.add_argument('--perdidas', type=float, default=0.0, help="Fracción de respuestas a órdenes que se pierden")
+    parser.add_argument('--caida', type=float, default=None, help="Segundo de la prueba en que se corta la conexión")
+    parser.add_argument('--replay', default=None, help="Directorio de ticks grabados para reproducir")
+    args = parser.parse_args()
+
+    from supervisor import MultiAssetSupervisor
+
+    api = SimulatedIQOption(n_assets=args.activos, tick_rate=args.tasa, settle_delay=args.retardo,
+                            buy_latency=args.latencia, reply_loss=args.perdidas, replay_dir=args.replay)
+    supervisor = MultiAssetSupervisor(None, None, 1, api.assets, api=api)
+    inicio = time.time()
+    if not supervisor.start():
+        return
+    if args.caida is not None:
+        threading.Timer(args.caida, api.desconectar).start()
+    try:
+        time.sleep(args.duracion)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+        api.close()
+    transcurrido = time.time() - inicio
+
+    ordenes = list(api.orders.values())
+    segundos = sorted(o['creada'] % 60 for o in ordenes)
+    liquidadas = [o for o in ordenes if o['resultado'] is not None]
+    logging.info(f"Ticks emitidos: {api.ticks_emitted} ({api.ticks_emitted / transcurrido:.1f}/s)")
+    logging.info(f"Órdenes: {len(ordenes)}, liquidadas: {len(liquidadas)}")
+    if segundos:
+        logging.info(f"Segundo de envío de las órdenes: min {segundos[0]:.3f}, "
+                     f"mediana {segundos[len(segundos) // 2]:.3f}, max {segundos[-1]:.3f}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    main()
@@ -0,0 +1,155 @@
+import logging
+import queue
+import threading
+import time
+
+
+class CandleFeed(dict):
+    """Diccionario de velas que avisa de cada actualización que llega por el stream."""
+
+    def __init__(self, data, callback):
+        super().__init__(data)
+        self.callback = callback
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        try:
+            self.callback(value)
+        except Exception as e:
+            logging.error(f"Error en el callback de ticks: {e}")
+
+
+def hook_candle_stream(api, asset, size, callback):
+    """Sustituye el buffer de velas en tiempo real de la API por un CandleFeed.
+
+    Devuelve el CandleFeed instalado, o None si la API no expone el buffer interno y
+    hay que recurrir al sondeo.
+    """
+    try:
+        tabla = api.api.real_time_candles[asset]
+    except (AttributeError, KeyError, TypeError):
+        return None
+    actual = tabla.get(size, {})
+    tabla[size] = actual if isinstance(actual, CandleFeed) else CandleFeed(actual, callback)
+    tabla[size].callback = callback
+    return tabla[size]
+
+
+def candle_feed(api, asset, size):
+    """Buffer de velas que la API usa ahora mismo para el activo, o None."""
+    try:
+        return api.api.real_time_candles[asset].get(size)
+    except (AttributeError, KeyError, TypeError):
+        return None
+
+
+def unhook_candle_stream(api, asset, size):
+    try:
+        tabla = api.api.real_time_candles[asset]
+    except (AttributeError, KeyError, TypeError):
+        return
+    actual = tabla.get(size)
+    if isinstance(actual, CandleFeed):
+        tabla[size] = dict(actual)
+
+
+def candle_to_tick(candle):
+    at = candle.get('at')
+    timestamp = at / 1e9 if at else time.time()
+    return {'price': candle['close'], 'timestamp': timestamp}
+
+
+class TickStream:
+    """Cola de ticks alimentada por el stream de velas de un activo.
+
+    En modo push cada cierre nuevo se encola desde el hilo del websocket en cuanto
+    llega. Si la API no permite engancharse al buffer se sondea en un hilo aparte.
+    Una reconexión de iqoptionapi reemplaza api.api y sus buffers de velas, así que
+    get() y clear() comprueban que el CandleFeed sigue instalado y, si no, vuelven a
+    engancharse o pasan a sondeo.
+    """
+
+    def __init__(self, api, asset, size, poll_interval=0.05, recorder=None, scheduler=None, check_interval=0.5):
+        self.api = api
+        self.recorder = recorder
+        self.scheduler = scheduler
+        self.asset = asset
+        self.size = size
+        self.poll_interval = poll_interval
+        self.queue = queue.Queue()
+        self.check_interval = check_interval
+        self.mode = None
+        self.feed = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _on_candle(self, candle):
+        tick = candle_to_tick(candle)
+        if self.scheduler and candle.get('at'):
+            self.scheduler.sync(tick['timestamp'])
+        self.queue.put(tick)
+        if self.recorder:
+            self.recorder.record(self.asset, tick['timestamp'], tick['price'])
+
+    def start(self):
+        self._stop.clear()
+        self.feed = hook_candle_stream(self.api, self.asset, self.size, self._on_candle)
+        if self.feed is not None:
+            self.mode = 'push'
+        else:
+            self._iniciar_sondeo()
+        logging.info(f"Ingesta de ticks para {self.asset} en modo {self.mode}")
+
+    def _iniciar_sondeo(self):
+        self.mode = 'poll'
+        self._thread = threading.Thread(target=self._poll, name=f"ticks-{self.asset}", daemon=True)
+        self._thread.start()
+
+    def verificar(self):
+        """Vuelve a enganchar el stream si la API reemplazó el buffer de velas (p. ej. al reconectar)."""
+        if self.mode != 'push' or self._stop.is_set() or candle_feed(self.api, self.asset, self.size) is self.feed:
+            return
+        self.feed = hook_candle_stream(self.api, self.asset, self.size, self._on_candle)
+        if self.feed is not None:
+            logging.warning(f"Buffer de velas de {self.asset} reemplazado por la API, se vuelve a enganchar.")
+        else:
+            logging.warning(f"Buffer de velas de {self.asset} no disponible, se pasa a sondeo.")
+            self._iniciar_sondeo()
+
+    def stop(self):
+        self._stop.set()
+        if self.mode == 'push':
+            unhook_candle_stream(self.api, self.asset, self.size)
+        elif self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _poll(self):
+        ultimo = None
+        while not self._stop.is_set():
+            candles = self.api.get_realtime_candles(self.asset, self.size)
+            if candles:
+                candle = candles[max(candles.keys())]
+                clave = (candle.get('from'), candle.get('at'), candle['close'])
+                if clave != ultimo:
+                    ultimo = clave
+                    self._on_candle(candle)
+            self._stop.wait(self.poll_interval)
+
+    def clear(self):
+        self.verificar()
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def get(self, timeout):
+        fin = time.monotonic() + max(timeout, 0)
+        while True:
+            self.verificar()
+            try:
+                return self.queue.get(timeout=max(min(fin - time.monotonic(), self.check_interval), 0))
+            except queue.Empty:
+                if time.monotonic() >= fin:
+                    return None
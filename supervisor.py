@@ -0,0 +1,132 @@
+import logging
+import threading
+
+import bot as bot_module
+from bot import NumberPressureBot, crear_api, green, red, yellow
+from connection import ConnectionMonitor
+from orders import OrderDispatcher
+from scheduler import CandleScheduler
+from settlement import SettlementTracker
+
+
+class MultiAssetSupervisor:
+    """Ejecuta un NumberPressureBot por activo compartiendo una única sesión de IQ Option.
+
+    Cada activo tiene su propio stream, buffer de ticks y ciclo de análisis en un hilo
+    dedicado; las llamadas a la API que no son seguras entre hilos (apertura de streams
+    y órdenes) se serializan con un lock común. Las órdenes de una misma vela se
+    envían juntas a través de un OrderDispatcher.
+    """
+
+    def __init__(self, email, password, valor_entrada, assets, account_type="PRACTICE", api=None, ingestion_mode="push", recorder=None):
+        self.email = email
+        self.password = password
+        self.valor_entrada = valor_entrada
+        self.assets = assets
+        self.account_type = account_type
+        self.api = api
+        self.ingestion_mode = ingestion_mode
+        self.recorder = recorder
+        self.api_lock = threading.Lock()
+        self.bots = []
+        self.threads = []
+        self.settlement = None
+        self.dispatcher = None
+        self.scheduler = CandleScheduler()
+        self.monitor = None
+
+    def connect(self):
+        if not self.api:
+            self.api = crear_api(self.email, self.password)
+        check, reason = self.api.connect()
+        if not check:
+            logging.error(f"Conexión fallida: {reason}")
+            return False
+        self.api.change_balance(self.account_type)
+        logging.info(f"Conexión compartida establecida. Cuenta: {self.account_type}")
+        return True
+
+    def crear_bots(self):
+        for asset in self.assets:
+            try:
+                bot = NumberPressureBot(self.email, self.password, self.valor_entrada, asset,
+                                        self.account_type, self.api, self.ingestion_mode)
+            except ValueError as e:
+                logging.error(f"Se omite el activo {asset}: {e}")
+                print(f"{red}Se omite el activo {asset}: {e}")
+                continue
+            bot.order_lock = self.api_lock
+            bot.mostrar_ticks = False
+            bot.scheduler = self.scheduler
+            bot.recorder = self.recorder
+            self.bots.append(bot)
+        return self.bots
+
+    def start(self):
+        if bot_module.IA_ACTIVA:
+            bot_module.modelos.cargar_en_segundo_plano()
+            bot_module.modelos.vigilar()
+        if not self.connect():
+            return False
+        if not self.crear_bots():
+            logging.error("No hay activos válidos para operar.")
+            return False
+        self.bots[0].sincronizar_activos()
+        self.settlement = SettlementTracker(self.api, workers=max(4, len(self.bots)))
+        self.settlement.start()
+        self.dispatcher = OrderDispatcher(self.api, self.api_lock, esperadas=len(self.bots))
+        self.dispatcher.start()
+        self.monitor = ConnectionMonitor(self.api, self.account_type, lock=self.api_lock)
+        self.monitor.on_swap.append(self.cambiar_api)
+        for bot in self.bots:
+            bot.settlement = self.settlement
+            bot.dispatcher = self.dispatcher
+            bot.monitor = self.monitor
+        for bot in self.bots:
+            with self.api_lock:
+                bot.iniciar_stream()
+        self.monitor.start()
+        for bot in self.bots:
+            thread = threading.Thread(target=bot.ejecutar_ciclos, name=f"bot-{bot.asset}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"{green}Supervisor iniciado con {len(self.bots)} activos: {', '.join(b.asset for b in self.bots)}")
+        return True
+
+    def cambiar_api(self, api):
+        self.api = api
+        self.settlement.api = api
+        self.dispatcher.api = api
+        for bot in self.bots:
+            with self.api_lock:
+                bot.cambiar_api(api)
+
+    def stop(self):
+        if self.monitor:
+            self.monitor.stop()
+        bot_module.modelos.detener()
+        for bot in self.bots:
+            bot.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        for bot in self.bots:
+            with self.api_lock:
+                bot.detener_stream()
+        if self.dispatcher:
+            self.dispatcher.stop()
+        if self.settlement:
+            self.settlement.stop(timeout=90)
+
+    def run(self):
+        if not self.start():
+            print(f"{red}No se pudo iniciar el supervisor.")
+            return
+        try:
+            while any(thread.is_alive() for thread in self.threads):
+                for thread in self.threads:
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            logging.info("Supervisor detenido por el usuario.")
+            print(f"{yellow}Supervisor detenido por el usuario.")
+        finally:
+            self.stop()
@@ -0,0 +1,283 @@
+import argparse
+import csv
+import glob
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtest import NONE, CALL, colores, decisiones, liquidar, resumen
+from digits import inferir_precision, ultimos_digitos
+from prediction_table import PredictionTable
+from tick_buffer import BLUE
+from tick_recorder import TickReader
+
+SWEEP_DTYPE = np.dtype([('timestamp', '<f8'), ('price', '<f8'), ('digit', 'i1'), ('color', 'i1')])
+PARAMETROS = ('analyze_ticks', 'max_ticks', 'tick_start_time', 'check_time', 'win_threshold')
+
+# Arrays compartidos adjuntados por cada proceso del pool en _iniciar_worker
+_datos = {}
+
+
+def _compartir(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype)
+
+
+def _iniciar_worker(descriptores, tabla_info):
+    for clave, (name, shape, dtype) in descriptores.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _datos[clave] = np.ndarray(shape, dtype, buffer=shm.buf)
+        _datos[f'shm_{clave}'] = shm
+    _datos['tabla_info'] = tabla_info
+    if 'pred' in _datos:
+        _datos['tabla'] = PredictionTable.desde_arrays(_datos['pred'], _datos['win_prob'], tabla_info['results'],
+                                                       tabla_info['colors'], tabla_info['decisions'])
+
+
+def vencimiento(compra, expiration_mode=1):
+    """Cierre de una opción turbo comprada en `compra`: con menos de 30 s al cierre pasa al minuto siguiente."""
+    venc = (np.floor(compra / 60) + expiration_mode) * 60
+    return np.where(venc - compra < 30, venc + 60, venc)
+
+
+def simular(ticks, analyze_ticks, max_ticks, tick_start_time, check_time, candle_duration=60, expiration_mode=1):
+    """Reproduce los ciclos del bot vela a vela sobre ticks SWEEP_DTYPE ordenados por timestamp.
+
+    En cada vela se recogen los ticks de [tick_start_time, check_time); hacen falta al
+    menos max_ticks y se analizan los últimos analyze_ticks, con el primer tick del
+    ciclo en azul como tras reiniciar_ticks. La entrada es el último tick recogido y la
+    salida el último tick anterior al vencimiento.
+    """
+    ts = ticks['timestamp']
+    if len(ts) == 0:
+        return None
+    velas = np.arange(ts[0] // candle_duration * candle_duration, ts[-1], candle_duration)
+    lo = np.searchsorted(ts, velas + tick_start_time)
+    hi = np.searchsorted(ts, velas + check_time)
+    venc = vencimiento(velas + check_time, expiration_mode)
+    salida = np.searchsorted(ts, venc, side='right') - 1
+    validas = (hi - lo >= max_ticks) & (venc <= ts[-1])
+    lo, hi, salida = lo[validas], hi[validas], salida[validas]
+
+    idx = hi[:, None] - analyze_ticks + np.arange(analyze_ticks)
+    digits = ticks['digit'][idx]
+    colors = np.where(idx == lo[:, None], BLUE, ticks['color'][idx]).astype(np.int8)
+    return {
+        'digits': digits,
+        'colors': colors,
+        'acciones': decisiones(digits, colors),
+        'entrada': ticks['price'][hi - 1],
+        'salida': ticks['price'][salida],
+    }
+
+
+def _filtro_ia(sim):
+    """Predicción WIN y su probabilidad para cada ventana, con la tabla compartida (primeros 4 ticks)."""
+    info = _datos['tabla_info']
+    colors = np.asarray(info['colores'])[sim['colors'][:, :4]]
+    decision = np.where(sim['acciones'] == CALL, info['call'], info['put'])
+    resultados, win_prob = _datos['tabla'].predecir_lote(sim['digits'][:, :4], colors, decision)
+    return resultados == 'WIN', win_prob
+
+
+def evaluar(tarea):
+    """Evalúa en un worker un bloque de combinaciones de parámetros para un activo."""
+    asset, a, b, combinaciones, umbrales, payout = tarea
+    ticks = _datos['ticks'][a:b]
+    resultados = []
+    for analyze_ticks, max_ticks, tick_start_time, check_time in combinaciones:
+        sim = simular(ticks, analyze_ticks, max_ticks, tick_start_time, check_time)
+        if sim is None:
+            continue
+        profit = liquidar(sim['acciones'], sim['entrada'], sim['salida'], payout)
+        ia = _filtro_ia(sim) if 'tabla' in _datos and analyze_ticks >= 4 else None
+        for umbral in umbrales:
+            acciones = sim['acciones']
+            if ia is not None and umbral is not None:
+                gana, prob = ia
+                acciones = np.where(gana & (prob >= umbral), acciones, NONE)
+            fila = dict(zip(PARAMETROS, (analyze_ticks, max_ticks, tick_start_time, check_time, umbral)))
+            fila.update(resumen({'acciones': acciones, 'profit': np.where(acciones == NONE, 0.0, profit)}))
+            fila['asset'] = asset
+            resultados.append(fila)
+    return resultados
+
+
+def cargar_ticks(reader, activos, precision=None, inicio=None, fin=None):
+    """Concatena los ticks de los activos en un array SWEEP_DTYPE con dígitos y colores ya calculados.
+
+    Devuelve el array y el tramo [a, b) de cada activo.
+    """
+    partes, tramos, n = [], {}, 0
+    for asset in activos:
+        ticks = reader.rango(asset, inicio, fin)
+        if len(ticks) < 2:
+            logging.warning(f"{asset}: no hay ticks grabados suficientes, se omite.")
+            continue
+        if np.any(np.diff(ticks['timestamp']) < 0):
+            ticks = np.sort(ticks, order='timestamp')
+        datos = np.empty(len(ticks), dtype=SWEEP_DTYPE)
+        datos['timestamp'] = ticks['timestamp']
+        datos['price'] = ticks['price']
+        datos['digit'] = ultimos_digitos(ticks['price'], precision or inferir_precision(ticks['price'][:1000]))
+        datos['color'] = colores(ticks['price'])
+        partes.append(datos)
+        tramos[asset] = (n, n + len(datos))
+        n += len(datos)
+    return (np.concatenate(partes) if partes else np.empty(0, dtype=SWEEP_DTYPE)), tramos
+
+
+def cargar_tabla(directory):
+    """Tabla de predicción del modelo entrenado en `directory`, o None si no hay modelo."""
+    from model_store import ModelStore
+
+    modelo = ModelStore(directory).cargar()
+    if modelo is None:
+        return None, None
+    tabla = modelo.tabla
+    try:
+        info = {'colores': [tabla.colors['blue'], tabla.colors['red']],
+                'call': tabla.decisions['CALL (UP)'], 'put': tabla.decisions['PUT (DOWN)'],
+                'results': tabla.results.tolist(), 'colors': tabla.colors, 'decisions': tabla.decisions}
+    except KeyError as e:
+        logging.warning(f"Los codificadores del modelo no reconocen {e}, se barre sin IA.")
+        return None, None
+    return tabla, info
+
+
+def combinaciones(args):
+    return [c for c in itertools.product(args.analyze_ticks, args.max_ticks, args.inicio, args.check)
+            if c[0] <= c[1] and c[2] < c[3]]
+
+
+def barrer(tramos, descriptores, tabla_info, combos, umbrales, payouts, workers=None, bloques_por_worker=4):
+    """Reparte las combinaciones en un pool de procesos; los ticks y la tabla viajan por memoria compartida."""
+    workers = workers or os.cpu_count() or 1
+    por_bloque = max(len(combos) * len(tramos) // (workers * bloques_por_worker), 1)
+    tareas = [(asset, a, b, combos[i:i + por_bloque], umbrales, payouts[asset])
+              for asset, (a, b) in tramos.items() for i in range(0, len(combos), por_bloque)]
+    resultados = []
+    with ProcessPoolExecutor(workers, initializer=_iniciar_worker, initargs=(descriptores, tabla_info)) as pool:
+        for parcial in pool.map(evaluar, tareas):
+            resultados.extend(parcial)
+    return resultados
+
+
+def ranking(resultados, min_operaciones=20):
+    """Resultados agrupados por activo y ordenados por lucro y tasa de acierto."""
+    por_activo = {}
+    for fila in resultados:
+        if fila['operaciones'] >= min_operaciones:
+            por_activo.setdefault(fila['asset'], []).append(fila)
+    for filas in por_activo.values():
+        filas.sort(key=lambda f: (f['lucro'], f['win_rate']), reverse=True)
+    return por_activo
+
+
+def resumen_historial(journal_path, umbrales):
+    """Lucro y acierto reales del diario de operaciones por activo si se hubiera exigido cada umbral."""
+    from journal import leer_operaciones
+
+    df = leer_operaciones(journal_path)
+    df = df[df['pred_prob'].notna()]
+    filas = []
+    for asset, grupo in df.groupby('asset'):
+        for umbral in umbrales:
+            operadas = grupo[(grupo['pred_result'] == 'WIN') & (grupo['pred_prob'] >= umbral)]
+            wins = int((operadas['result'] == 'WIN').sum())
+            losses = int((operadas['result'] == 'LOSS').sum())
+            filas.append({'asset': asset, 'win_threshold': umbral, 'operaciones': len(operadas),
+                          'win_rate': wins / max(wins + losses, 1), 'lucro': float(operadas['profit'].sum())})
+    return filas
+
+
+def _umbral(valor):
+    return '-' if valor is None else f'{valor:.2f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido paralelo de los parámetros de la estrategia sobre ticks grabados.")
+    parser.add_argument('--ticks', default='ticks', help="Directorio de TickRecorder")
+    parser.add_argument('--activos', nargs='*', default=None, help="Por defecto, todos los grabados")
+    parser.add_argument('--desde', type=float, default=None, help="Timestamp inicial")
+    parser.add_argument('--hasta', type=float, default=None, help="Timestamp final")
+    parser.add_argument('--precision', type=int, default=None)
+    parser.add_argument('--analyze-ticks', type=int, nargs='+', default=[3, 4, 5, 6])
+    parser.add_argument('--max-ticks', type=int, nargs='+', default=[4, 6, 8, 10, 12, 15])
+    parser.add_argument('--inicio', type=int, nargs='+', default=[30, 35, 40, 45, 50], help="tick_start_time")
+    parser.add_argument('--check', type=int, nargs='+', default=[55, 57, 58, 59], help="check_time")
+    parser.add_argument('--umbral', type=float, nargs='+', default=[0.5, 0.55, 0.6, 0.65, 0.7], help="win_threshold")
+    parser.add_argument('--modelo', default='.', help="Directorio del modelo entrenado")
+    parser.add_argument('--sin-ia', action='store_true', help="Ignora el modelo y win_threshold")
+    parser.add_argument('--payout', type=float, default=None, help="Por defecto, el del catálogo de activos o 0.85")
+    parser.add_argument('--catalogo', default=None, help="Caché de activos; por defecto la más reciente")
+    parser.add_argument('--journal', default='historico_operaciones.db')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--min-operaciones', type=int, default=20)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--salida', default=None, help="CSV con todos los resultados")
+    args = parser.parse_args()
+
+    reader = TickReader(args.ticks)
+    ticks, tramos = cargar_ticks(reader, args.activos or reader.activos(), args.precision, args.desde, args.hasta)
+    if not tramos:
+        logging.error(f"No hay ticks grabados en {args.ticks}")
+        return
+
+    tabla, tabla_info = (None, None) if args.sin_ia else cargar_tabla(args.modelo)
+    umbrales = [None] + args.umbral if tabla is not None else [None]
+
+    from asset_catalog import AssetCatalog
+    caches = sorted(glob.glob('activos_cache_*.json'), key=os.path.getmtime)
+    catalogo = AssetCatalog(None, path=args.catalogo or (caches[-1] if caches else None))
+    payouts = {asset: args.payout or catalogo.payout(asset) or 0.85 for asset in tramos}
+
+    memorias = []
+    try:
+        shm, descriptor = _compartir(ticks)
+        memorias.append(shm)
+        descriptores = {'ticks': descriptor}
+        if tabla is not None:
+            for clave, array in (('win_prob', tabla.win_prob), ('pred', tabla.pred)):
+                shm, descriptores[clave] = _compartir(array)
+                memorias.append(shm)
+        del ticks
+
+        combos = combinaciones(args)
+        logging.info(f"Barriendo {len(combos) * len(umbrales)} combinaciones en {len(tramos)} activos...")
+        resultados = barrer(tramos, descriptores, tabla_info, combos, umbrales, payouts, args.workers)
+    finally:
+        for shm in memorias:
+            shm.close()
+            shm.unlink()
+
+    for asset, filas in sorted(ranking(resultados, args.min_operaciones).items()):
+        logging.info(f"{asset} (payout {payouts[asset]:.2f}):")
+        for i, f in enumerate(filas[:args.top], 1):
+            logging.info(f"  {i:2d}. ticks={f['analyze_ticks']} max={f['max_ticks']:2d} inicio={f['tick_start_time']} "
+                         f"check={f['check_time']} umbral={_umbral(f['win_threshold'])} | "
+                         f"ops={f['operaciones']:5d} win={f['win_rate']:.2%} lucro={f['lucro']:+.2f}")
+
+    if tabla is not None and os.path.exists(args.journal):
+        logging.info(f"Operaciones reales de {args.journal} por win_threshold:")
+        for f in resumen_historial(args.journal, args.umbral):
+            logging.info(f"  {f['asset']} umbral={f['win_threshold']:.2f} ops={f['operaciones']:5d} "
+                         f"win={f['win_rate']:.2%} lucro={f['lucro']:+.2f}")
+
+    if args.salida:
+        with open(args.salida, 'w', newline='') as archivo:
+            writer = csv.DictWriter(archivo, fieldnames=['asset', *PARAMETROS, 'ventanas', 'operaciones', 'calls',
+                                                         'puts', 'wins', 'losses', 'empates', 'win_rate', 'lucro'])
+            writer.writeheader()
+            writer.writerows(resultados)
+        logging.info(f"Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    main()
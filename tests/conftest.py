@@ -0,0 +1,27 @@
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def bot_simulado():
+    """NumberPressureBot sobre el simulador, sin IA ni salida por consola."""
+    import bot
+    from simulator import SimulatedIQOption
+
+    api = SimulatedIQOption(n_assets=1, precision=5, seed=0)
+    b = bot.NumberPressureBot(None, None, 1, api.assets[0], api=api, precision=5)
+    b.mostrar_ticks = False
+    b.usar_ia = False
+    return b
+
+
+def analizar(b):
+    """analyze_pressure sin imprimir el análisis."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return b.analyze_pressure()
@@ -0,0 +1,42 @@
+import numpy as np
+
+from backtest import CALL, NONE, PUT, backtest_ticks, colores, decisiones, liquidar
+from conftest import analizar
+
+ACCIONES = {'call': CALL, 'put': PUT, None: NONE}
+
+
+def _decision_del_bot(b, digits, colors):
+    b.max_ticks = b.analyze_ticks = len(digits)
+    b.reiniciar_ticks()
+    for digit, color in zip(digits, colors):
+        b.ticks.push(1.0, digit, color)
+    action, _, _ = analizar(b)
+    return ACCIONES[action]
+
+
+def test_decisiones_coincide_con_analyze_pressure(bot_simulado):
+    rng = np.random.default_rng(2)
+    for k in (3, 4, 6):
+        digits = rng.integers(0, 10, (2000, k))
+        colors = rng.integers(0, 2, (2000, k))
+        esperado = [_decision_del_bot(bot_simulado, d.tolist(), c.tolist()) for d, c in zip(digits, colors)]
+        assert decisiones(digits, colors).tolist() == esperado
+
+
+def test_colores_como_process_tick():
+    assert colores([1.0, 1.0, 0.9, 1.2]).tolist() == [0, 0, 1, 0]
+
+
+def test_liquidar():
+    acciones = np.array([CALL, PUT, CALL, NONE])
+    entrada = np.array([1.0, 1.0, 1.0, 1.0])
+    salida = np.array([1.1, 1.1, 1.0, 2.0])
+    assert liquidar(acciones, entrada, salida, payout=0.8).tolist() == [0.8, -1.0, 0.0, 0.0]
+
+
+def test_backtest_ticks_sin_salida_no_opera():
+    prices = np.round(1.1 + np.cumsum(np.random.default_rng(3).integers(-5, 6, 200)) * 1e-5, 5)
+    resultado = backtest_ticks(prices, precision=5, horizon=10)
+    assert len(resultado['acciones']) == len(prices) - 3
+    assert (resultado['acciones'][-10:] == NONE).all()
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from digits import inferir_precision, ultimo_digito, ultimos_digitos
+
+
+@pytest.mark.parametrize('price, precision, digito', [
+    (18.10, 2, 1),        # str(18.10) es '18.1': el cero final no aparece
+    (1.23450, 5, 5),
+    (0.1 + 0.2, 2, 3),    # 0.30000000000000004
+    (1.5e-05, 6, 1),      # str() da notación científica
+    (5e-05, 5, 0),
+    (107.3, 1, 3),
+    (1234.0, 0, 0),
+])
+def test_ultimo_digito(price, precision, digito):
+    assert ultimo_digito(price, precision) == digito
+    assert ultimos_digitos([price], precision).tolist() == [digito]
+
+
+@pytest.mark.parametrize('precision', range(7))
+def test_vectorizado_igual_que_escalar(precision):
+    rng = np.random.default_rng(precision)
+    prices = np.round(rng.uniform(1e-4, 2000, 5000), precision)
+    assert ultimos_digitos(prices, precision).tolist() == [ultimo_digito(p, precision) for p in prices]
+
+
+def test_inferir_precision():
+    assert inferir_precision([18.1, 18.12, 18.0]) == 2
+    assert inferir_precision([1.5e-05]) == 6
+
+
+def test_bot_usa_la_precision_del_activo(bot_simulado):
+    assert bot_simulado.get_last_digit(1.1000) == 0
+    assert bot_simulado.get_last_digit(1.10010) == 1
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from orders import OrderDispatcher
+from simulator import SimulatedIQOption
+
+
+def _api(n_assets, **kwargs):
+    api = SimulatedIQOption(n_assets=n_assets, buy_latency=0.05, seed=0, **kwargs)
+    api.connect()
+    for asset in api.assets:
+        api.start_candles_stream(asset, 1, 100)
+    return api
+
+
+def _enviar_a_la_vez(dispatcher, assets):
+    resultados = {}
+
+    def comprar(asset, action):
+        resultados[asset] = (action, dispatcher.buy(1, asset, action, 1))
+
+    hilos = [threading.Thread(target=comprar, args=(asset, ('call', 'put')[i % 2])) for i, asset in enumerate(assets)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+
+def test_buy_multi_del_simulador_desordena_como_la_api_real():
+    api = _api(12)
+    try:
+        ids = api.buy_multi([1] * 12, api.assets, ['call'] * 12, [1] * 12)
+        assert [api.orders[i]['asset'] for i in ids] != api.assets
+    finally:
+        api.close()
+
+
+def test_cada_bot_recibe_el_id_de_su_orden():
+    api = _api(25)
+    dispatcher = OrderDispatcher(api, esperadas=25)
+    try:
+        resultados = _enviar_a_la_vez(dispatcher, api.assets)
+        assert len(api.orders) == 25
+        for asset, (action, (check, order_id)) in resultados.items():
+            assert check
+            assert (api.orders[order_id]['asset'], api.orders[order_id]['action']) == (asset, action)
+    finally:
+        dispatcher.stop()
+        api.close()
+
+
+def test_respuesta_perdida_libera_el_lock():
+    api = _api(3, reply_loss=1.0)
+    lock = threading.Lock()
+    dispatcher = OrderDispatcher(api, lock, esperadas=3, timeout=0.3)
+    try:
+        inicio = time.monotonic()
+        resultados = _enviar_a_la_vez(dispatcher, api.assets)
+        assert time.monotonic() - inicio < 2
+        assert all(resultado == (False, None) for _, resultado in resultados.values())
+        assert lock.acquire(timeout=1)
+        lock.release()
+    finally:
+        dispatcher.stop()
+        api.close()
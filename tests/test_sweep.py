@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+import sweep
+from backtest import CALL, NONE, PUT
+from conftest import analizar
+
+ACCIONES = {'call': CALL, 'put': PUT, None: NONE}
+
+
+@pytest.fixture
+def ticks():
+    rng = np.random.default_rng(4)
+    n = 6000
+    datos = np.empty(n, dtype=sweep.SWEEP_DTYPE)
+    datos['timestamp'] = 1790000000 + np.cumsum(rng.exponential(0.5, n))
+    datos['price'] = np.round(1.1 + np.cumsum(rng.normal(0, 2e-5, n)), 5)
+    datos['digit'] = sweep.ultimos_digitos(datos['price'], 5)
+    datos['color'] = sweep.colores(datos['price'])
+    return datos
+
+
+def _ciclos_del_bot(b, ticks, tick_start_time, check_time):
+    """Acciones del bot vela a vela alimentándolo con los ticks de cada ventana de recolección."""
+    ts = ticks['timestamp']
+    acciones = []
+    for vela in np.arange(ts[0] // 60 * 60, ts[-1], 60):
+        if sweep.vencimiento(vela + check_time) > ts[-1]:
+            continue
+        b.reiniciar_ticks()
+        for tick in ticks[(ts >= vela + tick_start_time) & (ts < vela + check_time)]:
+            b.process_tick({'price': float(tick['price'])})
+        action, _, _ = analizar(b)
+        if len(b.ticks) >= b.max_ticks:
+            acciones.append(ACCIONES[action])
+    return acciones
+
+
+@pytest.mark.parametrize('parametros', [(4, 10, 40, 59), (3, 4, 30, 55), (6, 12, 45, 58)])
+def test_simular_coincide_con_el_ciclo_del_bot(bot_simulado, ticks, parametros):
+    analyze_ticks, max_ticks, tick_start_time, check_time = parametros
+    bot_simulado.analyze_ticks, bot_simulado.max_ticks = analyze_ticks, max_ticks
+    sim = sweep.simular(ticks, *parametros)
+    assert sim['acciones'].tolist() == _ciclos_del_bot(bot_simulado, ticks, tick_start_time, check_time)
+
+
+def test_vencimiento_turbo():
+    assert sweep.vencimiento(np.array([59.0, 20.0, 30.0])).tolist() == [120.0, 60.0, 60.0]
+
+
+def test_barrer_en_paralelo_igual_que_en_proceso(ticks):
+    combos = [(4, 10, 40, 59), (3, 6, 35, 57)]
+    shm, descriptor = sweep._compartir(ticks)
+    try:
+        paralelo = sweep.barrer({'A': (0, len(ticks))}, {'ticks': descriptor}, None, combos, [None], {'A': 0.85},
+                                workers=2)
+        sweep._iniciar_worker({'ticks': descriptor}, None)
+        local = sweep.evaluar(('A', 0, len(ticks), combos, [None], 0.85))
+    finally:
+        sweep._datos.clear()
+        shm.close()
+        shm.unlink()
+    clave = lambda f: tuple(f[p] for p in sweep.PARAMETROS[:4])
+    assert sorted(paralelo, key=clave) == sorted(local, key=clave)
+
+
+def test_filtro_ia_coincide_con_la_tabla(ticks):
+    rng = np.random.default_rng(1)
+    shape = (10, 2) * 4 + (2,)
+    colors, decisions = {'blue': 0, 'red': 1}, {'CALL (UP)': 0, 'PUT (DOWN)': 1}
+    tabla = sweep.PredictionTable.desde_arrays(rng.integers(0, 2, shape).astype(np.uint8),
+                                               rng.random(shape).astype(np.float32), ['LOSS', 'WIN'], colors, decisions)
+    info = {'colores': [0, 1], 'call': 0, 'put': 1, 'results': ['LOSS', 'WIN'], 'colors': colors,
+            'decisions': decisions}
+    memorias, descriptores = [], {}
+    for clave, array in (('pred', tabla.pred), ('win_prob', tabla.win_prob)):
+        shm, descriptores[clave] = sweep._compartir(array)
+        memorias.append(shm)
+    try:
+        sweep._iniciar_worker(descriptores, info)
+        sim = sweep.simular(ticks, 4, 10, 40, 59)
+        gana, prob = sweep._filtro_ia(sim)
+    finally:
+        sweep._datos.clear()
+        for shm in memorias:
+            shm.close()
+            shm.unlink()
+    nombres = {0: 'blue', 1: 'red'}
+    for fila in range(len(sim['acciones'])):
+        digits_info = [{'digit': int(d), 'color': nombres[int(c)]}
+                       for d, c in zip(sim['digits'][fila], sim['colors'][fila])]
+        decision = 'CALL (UP)' if sim['acciones'][fila] == CALL else 'PUT (DOWN)'
+        resultado, win_prob = tabla.predecir(digits_info, decision)
+        assert (gana[fila], prob[fila]) == (resultado == 'WIN', np.float32(win_prob))
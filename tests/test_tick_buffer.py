@@ -0,0 +1,57 @@
+import numpy as np
+
+from conftest import analizar
+from tick_buffer import TickRingBuffer
+
+
+def test_last_devuelve_los_ultimos_ticks_en_orden():
+    rng = np.random.default_rng(0)
+    buffer = TickRingBuffer(7)
+    referencia = []
+    for i in range(50):
+        price, digit, color = float(rng.normal()), int(rng.integers(10)), int(rng.integers(2))
+        buffer.push(price, digit, color, float(i))
+        referencia = (referencia + [(price, digit, color)])[-7:]
+        for n in (1, 4, 7):
+            prices, digits, colors = buffer.last(n)
+            esperado = referencia[-n:]
+            assert prices.tolist() == [p for p, _, _ in esperado]
+            assert digits.tolist() == [d for _, d, _ in esperado]
+            assert colors.tolist() == [c for _, _, c in esperado]
+        assert buffer.last_price == referencia[-1][0]
+
+
+def test_clear_reinicia_el_color_del_primer_tick():
+    buffer = TickRingBuffer(3)
+    buffer.push(1.0, 1, 1)
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.last_price is None
+
+
+def _ciclo_con_lista(b, prices):
+    """Ciclo original: lista de dicts con pop(0) y dígitos calculados al analizar."""
+    ticks = []
+    for price in prices:
+        color = 'blue' if len(ticks) == 0 or price >= ticks[-1]['price'] else 'red'
+        ticks.append({'price': price, 'color': color})
+        if len(ticks) > b.max_ticks:
+            ticks.pop(0)
+    if len(ticks) < b.max_ticks:
+        return []
+    recientes = ticks[-b.analyze_ticks:]
+    return [{'digit': b.get_last_digit(t['price']), 'color': t['color']} for t in recientes]
+
+
+def test_ciclo_equivalente_a_la_lista_original(bot_simulado):
+    rng = np.random.default_rng(1)
+    b = bot_simulado
+    for _ in range(500):
+        b.max_ticks = int(rng.integers(4, 13))
+        b.analyze_ticks = int(rng.integers(2, b.max_ticks + 1))
+        n = int(rng.integers(0, 30))
+        prices = np.round(1.1 + np.cumsum(rng.integers(-20, 21, n)) * 1e-5, 5).tolist()
+        b.reiniciar_ticks()
+        for price in prices:
+            b.process_tick({'price': price})
+        _, digits_info, _ = analizar(b)
+        assert digits_info == _ciclo_con_lista(b, prices)
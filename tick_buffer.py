@@ -0,0 +1,51 @@
+import numpy as np
+
+COLORS = ('blue', 'red')
+BLUE = 0
+RED = 1
+
+
+class TickRingBuffer:
+    """Buffer circular de capacidad fija para el historial de ticks.
+
+    Guarda precio, dígito, color y timestamp en arrays preasignados. Cada tick se
+    escribe dos veces (en i y en i + capacity) para que los últimos n ticks sean
+    siempre un tramo contiguo y last(n) devuelva vistas sin copiar.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.prices = np.zeros(2 * capacity, dtype=np.float64)
+        self.digits = np.zeros(2 * capacity, dtype=np.int8)
+        self.colors = np.zeros(2 * capacity, dtype=np.int8)
+        self.timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    @property
+    def last_price(self):
+        if self.count == 0:
+            return None
+        return self.prices[self.head + self.capacity - 1]
+
+    def push(self, price, digit, color, timestamp=0.0):
+        for i in (self.head, self.head + self.capacity):
+            self.prices[i] = price
+            self.digits[i] = digit
+            self.colors[i] = color
+            self.timestamps[i] = timestamp
+        self.head = (self.head + 1) % self.capacity
+        self.count += 1
+
+    def last(self, n):
+        """Devuelve vistas (precios, dígitos, colores) de los últimos n ticks."""
+        n = min(n, len(self))
+        end = self.head + self.capacity
+        return self.prices[end - n:end], self.digits[end - n:end], self.colors[end - n:end]
@@ -0,0 +1,92 @@
+import datetime
+import os
+
+import numpy as np
+
+from journal import BufferedJournal
+
+TICK_DTYPE = np.dtype([('timestamp', '<f8'), ('price', '<f8')])
+
+
+def _dia(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%d')
+
+
+def ruta_ticks(directory, asset, dia):
+    return os.path.join(directory, asset, f'{dia}.bin')
+
+
+class TickRecorder(BufferedJournal):
+    """Graba cada tick recibido en archivos binarios de ancho fijo, uno por activo y día (UTC).
+
+    Cada registro ocupa 16 bytes (timestamp del servidor y precio en float64); la
+    escritura se hace por lotes en el hilo de fondo heredado de BufferedJournal.
+    """
+
+    def __init__(self, directory='ticks', **kwargs):
+        self.directory = directory
+        super().__init__(**kwargs)
+
+    def record(self, asset, timestamp, price):
+        self.registrar((asset, timestamp, price))
+
+    def _escribir(self, filas):
+        grupos = {}
+        for asset, timestamp, price in filas:
+            grupos.setdefault((asset, _dia(timestamp)), []).append((timestamp, price))
+        for (asset, dia), registros in grupos.items():
+            path = ruta_ticks(self.directory, asset, dia)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'ab') as archivo:
+                archivo.write(np.array(registros, dtype=TICK_DTYPE).tobytes())
+
+
+def leer_archivo(path):
+    """Mapea en memoria un archivo de ticks; ignora un último registro incompleto."""
+    n = os.path.getsize(path) // TICK_DTYPE.itemsize
+    if n == 0:
+        return np.empty(0, dtype=TICK_DTYPE)
+    return np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(n,))
+
+
+class TickReader:
+    """Lectura sin copia de los ticks grabados por TickRecorder."""
+
+    def __init__(self, directory='ticks'):
+        self.directory = directory
+
+    def activos(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(d for d in os.listdir(self.directory) if os.path.isdir(os.path.join(self.directory, d)))
+
+    def dias(self, asset):
+        carpeta = os.path.join(self.directory, asset)
+        if not os.path.isdir(carpeta):
+            return []
+        return sorted(f[:-4] for f in os.listdir(carpeta) if f.endswith('.bin'))
+
+    def cargar(self, asset, dia):
+        return leer_archivo(ruta_ticks(self.directory, asset, dia))
+
+    def rango(self, asset, inicio=None, fin=None):
+        """Ticks de `asset` con inicio <= timestamp < fin (segundos epoch).
+
+        Si el rango cae en un solo día devuelve una vista del memmap; si abarca varios
+        días concatena los tramos.
+        """
+        dias = self.dias(asset)
+        if inicio is not None:
+            dias = [d for d in dias if d >= _dia(inicio)]
+        if fin is not None:
+            dias = [d for d in dias if d <= _dia(fin)]
+        tramos = []
+        for dia in dias:
+            ticks = self.cargar(asset, dia)
+            a = 0 if inicio is None else np.searchsorted(ticks['timestamp'], inicio, side='left')
+            b = len(ticks) if fin is None else np.searchsorted(ticks['timestamp'], fin, side='left')
+            if b > a:
+                tramos.append(ticks[a:b])
+        if not tramos:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return tramos[0] if len(tramos) == 1 else np.concatenate(tramos)